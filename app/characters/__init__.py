@@ -0,0 +1,17 @@
+from app.characters.registry import PackRegistry
+from app.config.settings import PACKS_DIR, SHARED_PACKS_DIR
+from app.utils.string_table import SharedStringStore
+
+# Packs de personajes disponibles al crear salas (nombre -> personajes). Cada
+# módulo de este paquete con una lista `characters` es un pack, igual que cada
+# archivo JSON/CSV de PACKS_DIR; se cargan recién cuando una sala los usa.
+# Con SHARED_PACKS_DIR, los workers comparten una sola copia de cada pack
+PACKS = PackRegistry(
+    __name__,
+    __path__,
+    exclude={"registry"},
+    directory=PACKS_DIR,
+    shared=SharedStringStore(SHARED_PACKS_DIR) if SHARED_PACKS_DIR else None
+)
+
+DEFAULT_PACK = "animals"
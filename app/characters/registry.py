@@ -0,0 +1,227 @@
+import csv
+import importlib
+import importlib.util
+import json
+import logging
+import os
+import pkgutil
+import sys
+import time
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from app.utils.string_table import SharedStringStore
+
+logger = logging.getLogger(__name__)
+
+# Personajes de un pack: tupla inmutable de strings internados (o StringTable
+# mapeada en memoria compartida entre procesos)
+PackCharacters = Sequence[str]
+
+# Extensiones de los archivos de packs del directorio de datos
+PACK_FILE_SUFFIXES = (".json", ".csv")
+
+
+def load_pack_file(path: str) -> Tuple[str, ...]:
+    """
+    Lee un pack desde un archivo JSON o CSV (bloqueante).
+
+    JSON: lista de nombres, lista de objetos con `name` u objeto con una lista
+    `characters` de cualquiera de las dos formas. CSV: un personaje por fila en
+    la primera columna (encabezado `name` opcional). Los nombres repetidos se
+    descartan.
+
+    Raises:
+        ValueError: Si el archivo no tiene un formato válido o no tiene personajes
+    """
+    if path.endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = data.get("characters")
+        if not isinstance(data, list):
+            raise ValueError(f"{path}: se esperaba una lista de personajes")
+        names = [item.get("name") if isinstance(item, dict) else item for item in data]
+    else:
+        with open(path, encoding="utf-8", newline="") as f:
+            names = [row[0] for row in csv.reader(f) if row]
+        if names and names[0].strip().lower() == "name":
+            names = names[1:]
+    if not all(isinstance(name, str) for name in names):
+        raise ValueError(f"{path}: los personajes deben ser strings")
+    characters = tuple(dict.fromkeys(sys.intern(name.strip()) for name in names if name.strip()))
+    if not characters:
+        raise ValueError(f"{path}: el pack no tiene personajes")
+    return characters
+
+
+class PackRegistry(Mapping):
+    """
+    Registro perezoso de los packs de personajes de un paquete y, opcionalmente,
+    de un directorio de archivos JSON/CSV.
+
+    Los packs se descubren por nombre de módulo (pkgutil, sin importarlos) o de
+    archivo, y cada uno se carga recién la primera vez que se pide. Al cargarlo
+    queda como una tupla de strings internados (el módulo se descarta, así en
+    memoria queda solo la tupla). Un archivo con el mismo nombre que un módulo
+    lo reemplaza. Los packs que ninguna sala usa hace un tiempo se descargan
+    con unload_unused().
+
+    Las tuplas nunca se modifican: recargar un pack (swap) reemplaza la tupla
+    por otra y quien tenga la anterior la sigue usando sin cambios.
+
+    Con `shared`, cada pack se publica una vez como tabla de strings en un
+    archivo mapeado en memoria y los demás procesos mapean ese mismo archivo
+    en lugar de cargar su propia copia.
+    """
+
+    def __init__(
+        self,
+        package: str,
+        path: Iterable[str],
+        exclude: Iterable[str] = (),
+        directory: Optional[str] = None,
+        shared: Optional[SharedStringStore] = None
+    ):
+        self.package = package
+        self.shared = shared
+        excluded = set(exclude)
+        self._modules = frozenset(
+            module.name
+            for module in pkgutil.iter_modules(list(path))
+            if not module.ispkg and not module.name.startswith("_") and module.name not in excluded
+        )
+        # Packs del directorio de datos: nombre -> ruta del archivo
+        self._files: Dict[str, str] = {}
+        self.directory = directory
+        if directory and os.path.isdir(directory):
+            for entry in os.scandir(directory):
+                if entry.is_file():
+                    self.add_file(entry.path)
+        self._loaded: Dict[str, PackCharacters] = {}
+        self._last_used: Dict[str, float] = {}
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._files or name in self._modules
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(sorted(self._modules | self._files.keys()))
+
+    def __len__(self) -> int:
+        return len(self._modules | self._files.keys())
+
+    def __getitem__(self, name: str) -> PackCharacters:
+        """Retorna los personajes del pack, cargándolo si hace falta"""
+        characters = self._loaded.get(name)
+        if characters is None:
+            if name not in self:
+                raise KeyError(name)
+            characters = self._loaded[name] = self._load(name)
+        self._last_used[name] = time.monotonic()
+        return characters
+
+    def _load(self, name: str) -> PackCharacters:
+        path = self._files.get(name)
+        if self.shared is not None:
+            # Reusar la tabla ya publicada por otro proceso si no es más vieja
+            # que el archivo o módulo de origen
+            table = None
+            try:
+                source = path or importlib.util.find_spec(f"{self.package}.{name}").origin
+                table = self.shared.open(f"pack-{name}", newer_than=os.path.getmtime(source))
+            except (OSError, AttributeError, ImportError, TypeError, ValueError) as e:
+                # Origen borrado o sin archivo: sin copia compartida, carga normal
+                logger.debug(f"No se pudo verificar la copia compartida del pack {name}: {e}")
+            if table is not None:
+                logger.info(f"Pack de personajes mapeado: {name} ({len(table)} personajes, {table.path})")
+                return table
+
+        if path is not None:
+            characters = load_pack_file(path)
+            logger.info(f"Pack de personajes cargado: {name} ({len(characters)} personajes, {path})")
+            return self._share(name, characters)
+
+        module_name = f"{self.package}.{name}"
+        module = importlib.import_module(module_name)
+        characters = tuple(sys.intern(character) for character in module.characters)
+        # Soltar el módulo (y su lista) para que solo quede la tupla
+        sys.modules.pop(module_name, None)
+        package = sys.modules.get(self.package)
+        if package is not None and getattr(package, name, None) is module:
+            delattr(package, name)
+        logger.info(f"Pack de personajes cargado: {name} ({len(characters)} personajes)")
+        return self._share(name, characters)
+
+    def _share(self, name: str, characters: Tuple[str, ...]) -> PackCharacters:
+        """Publica el pack en memoria compartida (si está habilitada) y retorna la versión a usar"""
+        if self.shared is None:
+            return characters
+        try:
+            return self.shared.publish(f"pack-{name}", characters)
+        except (OSError, ValueError) as e:
+            logger.warning(f"No se pudo compartir el pack {name}, se usa una copia local: {e}")
+            return characters
+
+    @staticmethod
+    def pack_name(path: str) -> Optional[str]:
+        """Nombre del pack de un archivo, o None si no es un archivo de pack"""
+        name, suffix = os.path.splitext(os.path.basename(path))
+        return name if suffix in PACK_FILE_SUFFIXES and not name.startswith(".") else None
+
+    def add_file(self, path: str) -> Optional[str]:
+        """Registra (sin leerlo) un archivo de pack. Retorna el nombre del pack"""
+        name = self.pack_name(path)
+        if name is not None:
+            self._files[name] = os.path.abspath(path)
+        return name
+
+    def remove_file(self, path: str) -> Optional[str]:
+        """
+        Quita un archivo de pack borrado. Las salas que lo usan conservan su
+        tupla; si había un módulo con el mismo nombre, vuelve a usarse.
+        """
+        name = self.pack_name(path)
+        if name is None or self._files.get(name) != os.path.abspath(path):
+            return None
+        del self._files[name]
+        self._loaded.pop(name, None)
+        self._last_used.pop(name, None)
+        if self.shared is not None:
+            self.shared.discard(f"pack-{name}")
+        return name
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._loaded
+
+    def swap(self, name: str, characters: Tuple[str, ...]) -> PackCharacters:
+        """Reemplaza la versión cargada de un pack por una nueva. Retorna la versión a usar"""
+        characters = self._share(name, characters)
+        self._loaded[name] = characters
+        self._last_used[name] = time.monotonic()
+        return characters
+
+    @property
+    def loaded(self) -> List[str]:
+        """Nombres de los packs cargados en memoria"""
+        return sorted(self._loaded)
+
+    def unload_unused(self, in_use: Iterable[str], idle_ttl: float, now: Optional[float] = None) -> List[str]:
+        """
+        Descarga los packs que no están en `in_use` ni se pidieron en los
+        últimos `idle_ttl` segundos. Retorna los nombres descargados.
+
+        Solo se descargan packs que ninguna sala referencia, así al volver a
+        pedirlos no quedan dos copias en memoria.
+        """
+        if now is None:
+            now = time.monotonic()
+        in_use = set(in_use)
+        unloaded = [
+            name
+            for name in self._loaded
+            if name not in in_use and now - self._last_used.get(name, now) >= idle_ttl
+        ]
+        for name in unloaded:
+            del self._loaded[name]
+            del self._last_used[name]
+        return unloaded
@@ -0,0 +1,129 @@
+import os
+import socket
+
+# Logging: nivel, formato ("text" o "json") y muestreo de los logs por mensaje
+# WebSocket recibido (nivel DEBUG): se registra uno de cada WS_LOG_SAMPLE
+# mensajes; 0 los desactiva
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+WS_LOG_SAMPLE = int(os.getenv("WS_LOG_SAMPLE", "0"))
+
+# Timeout (segundos) para cada envío individual por WebSocket. Un cliente que
+# no acepta el frame dentro de este tiempo se marca para desalojo.
+WS_SEND_TIMEOUT = float(os.getenv("WS_SEND_TIMEOUT", "2.0"))
+
+# Codec JSON por defecto para frames WebSocket: "auto" (orjson si está
+# instalado), "orjson" o "json" (librería estándar)
+WS_JSON_CODEC = os.getenv("WS_JSON_CODEC", "auto").lower()
+
+# Tamaño máximo de la cola de salida de cada conexión WebSocket
+WS_QUEUE_SIZE = int(os.getenv("WS_QUEUE_SIZE", "64"))
+
+# Política cuando la cola de salida se llena:
+# - "drop_oldest": descarta el estado de espera más antiguo
+# - "coalesce": conserva solo el estado de espera más reciente
+# - "disconnect": desconecta al cliente lento
+WS_QUEUE_POLICY = os.getenv("WS_QUEUE_POLICY", "coalesce").lower()
+
+# Techo global de conexiones WebSocket simultáneas de este proceso; las que
+# lo superan se rechazan antes del accept. 0 = sin límite
+MAX_CONNECTIONS = int(os.getenv("MAX_CONNECTIONS", "10000"))
+
+# Límites de mensajes entrantes (token bucket): WS_RATE_LIMIT mensajes por
+# segundo por conexión (ráfagas de hasta WS_RATE_BURST) y ROOM_ROUND_RATE
+# rondas por segundo por sala (ráfagas de hasta ROOM_ROUND_BURST). 0 desactiva
+# el límite. Política para los mensajes excedentes:
+# - "drop": se descartan
+# - "warn": se descartan y se avisa al cliente (código 5)
+# - "disconnect": se desconecta al cliente (cierre 1008)
+WS_RATE_LIMIT = float(os.getenv("WS_RATE_LIMIT", "20"))
+WS_RATE_BURST = float(os.getenv("WS_RATE_BURST", "40"))
+ROOM_ROUND_RATE = float(os.getenv("ROOM_ROUND_RATE", "1"))
+ROOM_ROUND_BURST = float(os.getenv("ROOM_ROUND_BURST", "3"))
+WS_RATE_POLICY = os.getenv("WS_RATE_POLICY", "drop").lower()
+
+# Ventana (segundos) en la que se agrupan los cambios del estado de espera de
+# una sala antes de enviarlos como un único delta
+WAITING_TICK = float(os.getenv("WAITING_TICK", "0.05"))
+
+# Heartbeat: cada HEARTBEAT_INTERVAL segundos se envía un ping (código 0) a las
+# conexiones inactivas; las que no envían nada durante HEARTBEAT_TIMEOUT
+# segundos se desconectan. HEARTBEAT_INTERVAL=0 desactiva el heartbeat
+HEARTBEAT_INTERVAL = float(os.getenv("HEARTBEAT_INTERVAL", "20"))
+HEARTBEAT_TIMEOUT = float(os.getenv("HEARTBEAT_TIMEOUT", "60"))
+
+# Ciclo de vida de salas (segundos): una sala creada a la que nunca se unió
+# nadie se elimina tras UNUSED_ROOM_TTL; una sala sin actividad tras
+# IDLE_ROOM_TTL. El barrido corre cada ROOM_SWEEP_INTERVAL
+UNUSED_ROOM_TTL = float(os.getenv("UNUSED_ROOM_TTL", "600"))
+IDLE_ROOM_TTL = float(os.getenv("IDLE_ROOM_TTL", "3600"))
+ROOM_SWEEP_INTERVAL = float(os.getenv("ROOM_SWEEP_INTERVAL", "30"))
+
+# Los packs de personajes se cargan al primer uso; uno que ninguna sala usa
+# se descarga de memoria tras PACK_IDLE_TTL segundos
+PACK_IDLE_TTL = float(os.getenv("PACK_IDLE_TTL", "600"))
+
+# Directorio de packs de personajes en JSON o CSV (el nombre del archivo es el
+# del pack). Se observa y los packs que cambian se recargan sin reiniciar.
+# Vacío (o inexistente al iniciar) lo desactiva
+PACKS_DIR = os.getenv("PACKS_DIR", "packs")
+
+# Directorio (idealmente en tmpfs, como /dev/shm/impostor) donde se publican
+# los packs y las colecciones cacheadas como tablas de strings mapeadas en
+# memoria: todos los workers que apuntan al mismo directorio comparten una
+# sola copia. Vacío lo desactiva (cada proceso guarda la suya)
+SHARED_PACKS_DIR = os.getenv("SHARED_PACKS_DIR", "")
+
+# Identificador de este proceso/nodo (se usa en el backplane y en la
+# ubicación de salas). Por defecto host + pid; con CLUSTER_NODES es obligatorio
+NODE_ID_CONFIGURED = bool(os.getenv("NODE_ID"))
+NODE_ID = os.getenv("NODE_ID") or f"{socket.gethostname()}-{os.getpid()}"
+
+# Prefijo de los IDs de sala generados por este proceso (letras, dígitos, "_"
+# o "-"). Con varios workers sin cluster, un prefijo distinto por worker evita
+# colisiones de IDs entre ellos. Con cluster debe ser el mismo en todos los
+# nodos (cada dueño valida el formato de los IDs que le reenvían)
+ROOM_ID_PREFIX = os.getenv("ROOM_ID_PREFIX", "")
+
+# Creación de salas en lote (POST /rooms/batch): máximo de salas por request y
+# cada cuántas salas se cede el event loop a las partidas en curso
+ROOM_BATCH_MAX = int(os.getenv("ROOM_BATCH_MAX", "1000"))
+ROOM_BATCH_CHUNK = int(os.getenv("ROOM_BATCH_CHUNK", "50"))
+
+# Máximo de jugadores por sala que se puede pedir al crearla (quota_players)
+MAX_QUOTA_PLAYERS = int(os.getenv("MAX_QUOTA_PLAYERS", "100"))
+
+# Segundos que una colección de personajes de la base de datos se mantiene en
+# cache para las salas creadas con collection_id. Las escrituras hechas por
+# este proceso la invalidan al instante; las de otros procesos se ven al vencer
+COLLECTION_CACHE_TTL = float(os.getenv("COLLECTION_CACHE_TTL", "300"))
+
+# Backplane entre procesos: con "unix" (sockets Unix en BACKPLANE_DIR) un
+# jugador puede conectarse a cualquier worker y se une a la sala del proceso
+# que la tiene. "inprocess" = un solo proceso
+BACKPLANE = os.getenv("BACKPLANE", "inprocess").lower()
+BACKPLANE_DIR = os.getenv("BACKPLANE_DIR", "/tmp/impostor-backplane")
+
+# Segundos que se espera la respuesta del proceso dueño de la sala al unirse
+# desde otro proceso. Sin respuesta, la sala no existe
+RELAY_JOIN_TIMEOUT = float(os.getenv("RELAY_JOIN_TIMEOUT", "1.0"))
+
+# Nodos del cluster para ubicar salas por hash consistente:
+# "node-a=http://10.0.0.1:8000,node-b=http://10.0.0.2:8000". Vacío = un solo
+# nodo (todas las salas son locales). NODE_ID debe ser uno de los nodos
+CLUSTER_NODES = os.getenv("CLUSTER_NODES", "")
+CLUSTER_VNODES = int(os.getenv("CLUSTER_VNODES", "128"))
+
+# Timeout (segundos) al reenviar la creación de salas al nodo dueño
+CLUSTER_FORWARD_TIMEOUT = float(os.getenv("CLUSTER_FORWARD_TIMEOUT", "5.0"))
+
+# Snapshots de salas para recuperar partidas tras un reinicio. SNAPSHOT_DIR
+# vacío (por defecto) los desactiva. Con varios procesos, cada uno necesita su
+# propio directorio. El log de cambios se compacta al superar SNAPSHOT_LOG_MAX líneas
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "")
+SNAPSHOT_INTERVAL = float(os.getenv("SNAPSHOT_INTERVAL", "2"))
+SNAPSHOT_LOG_MAX = int(os.getenv("SNAPSHOT_LOG_MAX", "10000"))
+
+# Segundos que un jugador desconectado conserva su lugar (rol, is_first, admin)
+# para reanudar con su resume_token. 0 desactiva la reanudación
+RESUME_GRACE = float(os.getenv("RESUME_GRACE", "30"))
@@ -1,18 +1,34 @@
 from typing import Optional
 import logging
 
-from fastapi import FastAPI, WebSocket
+from fastapi import FastAPI, HTTPException, WebSocket
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
-from app.characters.animals import characters as animals
+from app.characters import PACKS, DEFAULT_PACK
+from app.services.admission_service import AdmissionService
+from app.services.backplane import create_backplane
+from app.services.collection_cache import collection_cache
 from app.services.room_manager import RoomManager
+from app.services.room_creation_service import RoomCreationService
+from app.services.room_placement import RoomPlacement
+from app.services.room_relay import RoomRelay
+from app.services.heartbeat_service import HeartbeatService
+from app.services.pack_watcher_service import PackWatcherService
+from app.services.room_sweeper_service import RoomSweeperService
+from app.services.snapshot_service import SnapshotService
 from app.routes.websocket_routes import WebSocketRoutes
 from app.routes.character_collection_routes import router as collection_router
+from app.schemas.room_schema import RoomCreate, RoomBatchCreate, RoomBatchResponse, RoomForwardCreate
 from app.config.database import init_db
+from app.config.logging_config import setup_logging
+from app.config.settings import SNAPSHOT_DIR
+from app.utils.metrics import REGISTRY
+from app.utils.storage import SnapshotStore
 
-# Configurar logging
-logging.basicConfig(level=logging.INFO)
+# Configurar logging (los registros se escriben desde un hilo en segundo plano)
+setup_logging()
 logger = logging.getLogger(__name__)
 
 
@@ -31,8 +47,34 @@ class AllRoomsStatus(BaseModel):
 
 
 # Inicializar gestor de salas
-room_manager = RoomManager(quota_players=2, characters=animals)
-ws_routes = WebSocketRoutes(room_manager)
+backplane = create_backplane()
+room_placement = RoomPlacement()
+room_manager = RoomManager(
+    quota_players=2,
+    characters=PACKS[DEFAULT_PACK],
+    default_pack=DEFAULT_PACK,
+    placement=room_placement,
+    collection_cache=collection_cache
+)
+admission_service = AdmissionService()
+room_creation_service = RoomCreationService(room_manager, room_placement)
+# Jugadores conectados a un proceso que no tiene su sala
+room_relay = RoomRelay(backplane, room_manager.room_exists)
+ws_routes = WebSocketRoutes(room_manager, room_placement, admission_service, room_relay)
+heartbeat_service = HeartbeatService(room_manager)
+room_sweeper_service = RoomSweeperService(room_manager)
+pack_watcher_service = PackWatcherService(room_manager)
+# Métricas calculadas al exportar (sin costo en el camino caliente)
+REGISTRY.add_collector(room_manager.collect_metrics)
+REGISTRY.gauge(
+    "impostor_ws_connections", "Conexiones WebSocket abiertas",
+    callback=lambda: admission_service.active
+)
+REGISTRY.counter(
+    "impostor_ws_rejections_total", "Conexiones rechazadas antes del accept", ("reason",),
+    callback=lambda: {(reason,): count for reason, count in admission_service.rejected.items()}
+)
+snapshot_service = SnapshotService(room_manager, SnapshotStore(SNAPSHOT_DIR)) if SNAPSHOT_DIR else None
 
 # Crear app FastAPI
 app = FastAPI(
@@ -63,6 +105,28 @@ async def startup_event():
         logger.info("Base de datos inicializada correctamente")
     except Exception as e:
         logger.error(f"Error inicializando base de datos: {e}")
+    
+    if snapshot_service is not None:
+        restored = await snapshot_service.restore()
+        logger.info(f"Salas restauradas desde snapshot: {restored}")
+        snapshot_service.start()
+        await room_manager.warm_collections()
+    
+    await backplane.start(room_relay.handle)
+    heartbeat_service.start()
+    room_sweeper_service.start()
+    pack_watcher_service.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Evento de cierre para detener tareas en segundo plano"""
+    await heartbeat_service.stop()
+    await room_sweeper_service.stop()
+    await pack_watcher_service.stop()
+    await backplane.stop()
+    if snapshot_service is not None:
+        await snapshot_service.stop()
 
 # Rutas WebSocket
 @app.websocket(
@@ -72,13 +136,103 @@ async def startup_event():
 async def websocket_with_room(
     websocket: WebSocket,
     room_id: str,
-    player_name: Optional[str] = None
+    player_name: Optional[str] = None,
+    resume_token: Optional[str] = None
 ):
-    await ws_routes.handle_connection(websocket, room_id, player_name)
+    await ws_routes.handle_connection(websocket, room_id, player_name, resume_token)
 
 
 # Endpoint para crear una nueva sala (genera room_id)
 @app.post("/rooms", name="create_room")
-async def create_room():
-    room_id, _ = room_manager.get_or_create_room(None)
-    return {"room_id": room_id}
+async def create_room(room: Optional[RoomCreate] = None):
+    room = room or RoomCreate()
+    try:
+        room_id, = await room_creation_service.create_rooms(
+            1,
+            quota_players=room.quota_players,
+            character_pack=room.character_pack,
+            collection_id=room.collection_id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except ConnectionError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    return {
+        "room_id": room_id,
+        "node_id": room_placement.owner(room_id),
+        "node_url": room_placement.owner_url(room_id)
+    }
+
+
+# Endpoint para crear varias salas en una sola request (eventos)
+@app.post("/rooms/batch", name="create_rooms_batch", response_model=RoomBatchResponse)
+async def create_rooms_batch(batch: RoomBatchCreate):
+    try:
+        room_ids = await room_creation_service.create_rooms(
+            batch.count,
+            quota_players=batch.quota_players,
+            character_pack=batch.character_pack,
+            collection_id=batch.collection_id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except ConnectionError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    return {
+        "rooms": [
+            {
+                "room_id": room_id,
+                "node_id": room_placement.owner(room_id),
+                "node_url": room_placement.owner_url(room_id)
+            }
+            for room_id in room_ids
+        ]
+    }
+
+
+# Endpoint interno del cluster: crea las salas que otro nodo reenvía a su dueño
+@app.post(
+    "/internal/rooms", name="create_forwarded_rooms", response_model=RoomBatchResponse, include_in_schema=False
+)
+async def create_forwarded_rooms(forward: RoomForwardCreate):
+    if len(room_placement.nodes) == 1:
+        # Sin cluster nadie reenvía salas
+        raise HTTPException(status_code=404, detail="Not Found")
+    try:
+        room_ids = await room_creation_service.create_rooms(
+            len(forward.room_ids),
+            quota_players=forward.quota_players,
+            character_pack=forward.character_pack,
+            collection_id=forward.collection_id,
+            room_ids=forward.room_ids
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return {
+        "rooms": [
+            {
+                "room_id": room_id,
+                "node_id": room_placement.node_id,
+                "node_url": room_placement.owner_url(room_id)
+            }
+            for room_id in room_ids
+        ]
+    }
+
+
+# Endpoint con contadores del ciclo de vida de las salas y de admisión
+@app.get("/rooms/stats", name="rooms_stats")
+async def rooms_stats():
+    return {**room_manager.stats, **admission_service.stats, **collection_cache.stats, **room_relay.stats}
+
+
+# Endpoint de métricas en formato de texto de Prometheus
+@app.get("/metrics", name="metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -4,11 +4,17 @@ from typing import Optional
 class Player:
     """Modelo de entidad Player sin dependencias de WebSocket"""
     
+    __slots__ = ("name", "_role", "_is_first", "_is_admin", "resume_token", "_info_in_room")
+    
     def __init__(self, name: str):
         self.name = name
         self._role = "normal"
         self._is_first = False
         self._is_admin = False
+        # Token para reanudar la sesión tras una desconexión
+        self.resume_token: Optional[str] = None
+        # Payload de info_in_room ya construido; se invalida al cambiar el admin
+        self._info_in_room: Optional[dict] = None
 
     @property
     def is_admin(self) -> bool:
@@ -16,7 +22,9 @@ class Player:
 
     @is_admin.setter
     def is_admin(self, value: bool):
-        self._is_admin = value
+        if value != self._is_admin:
+            self._is_admin = value
+            self._info_in_room = None
 
     @property
     def role(self) -> str:
@@ -53,16 +61,20 @@ class Player:
     
     @property
     def info_in_room(self) -> dict:
-        return {
-            "name": self.name,
-            "is_admin": self.is_admin
-        }
+        """Datos públicos del jugador en la sala (dict compartido: no modificar)"""
+        if self._info_in_room is None:
+            self._info_in_room = {
+                "name": self.name,
+                "is_admin": self._is_admin
+            }
+        return self._info_in_room
     
     def info_in_round(self, character: Optional[str]) -> dict:
+        is_impostor = self._role == "impostor"
         return {
             "name": self.name,
-            "character": character if not self.is_impostor else None,
-            "is_impostor": self.is_impostor,
-            "is_first": self.is_first,
-            "is_admin": self.is_admin
+            "character": character if not is_impostor else None,
+            "is_impostor": is_impostor,
+            "is_first": self._is_first,
+            "is_admin": self._is_admin
         }
@@ -5,6 +5,7 @@ from app.config.database import get_db
 from app.repositories.postgres_character_collection_repository import PostgresCharacterCollectionRepository
 from app.repositories.postgres_character_repository import PostgresCharacterRepository
 from app.services.character_collection_service import CharacterCollectionService
+from app.services.collection_cache import collection_cache
 from app.schemas.character_collection_schema import (
     CharacterCollectionCreate,
     CharacterCollectionResponse,
@@ -28,7 +29,7 @@ def get_service(db: Session = Depends(get_db)) -> CharacterCollectionService:
     """Dependency para obtener el servicio de colecciones"""
     collection_repository = PostgresCharacterCollectionRepository(db)
     character_repository = PostgresCharacterRepository(db)
-    return CharacterCollectionService(collection_repository, character_repository)
+    return CharacterCollectionService(collection_repository, character_repository, collection_cache)
 
 
 @router.post(
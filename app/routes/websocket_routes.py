@@ -1,22 +1,68 @@
-from typing import Optional
+import asyncio
+import logging
+from typing import Optional, Set, Tuple
 
 from fastapi import WebSocket, WebSocketDisconnect, Query
+from fastapi.responses import Response
 
 from app.models.player import Player
+from app.services.admission_service import (
+    AdmissionService, REJECT_CODES, INVALID_NAME, NAME_TAKEN, RESUME_INVALID, ROOM_NOT_FOUND, SERVER_FULL
+)
+from app.services.connection import Connection
+from app.services.game_service import GameService
 from app.services.room_manager import RoomManager
+from app.services.room_placement import RoomPlacement
+from app.services.room_relay import RoomRelay
+from app.config.settings import WS_LOG_SAMPLE, WS_RATE_LIMIT, WS_RATE_BURST, WS_RATE_POLICY
+from app.utils.codecs import negotiate_codec
+from app.utils.metrics import REGISTRY
+from app.utils.rate_limit import TokenBucket
+from app.utils.utils import one_in_x
+
+logger = logging.getLogger(__name__)
+
+CONNECTS = REGISTRY.counter("impostor_ws_connects_total", "Conexiones WebSocket admitidas", ("kind",))
+CONNECTS_NEW = CONNECTS.labels("new")
+CONNECTS_RESUME = CONNECTS.labels("resume")
+DISCONNECTS = REGISTRY.counter("impostor_ws_disconnects_total", "Conexiones WebSocket terminadas", ("reason",))
+DISCONNECTS_CLOSED = DISCONNECTS.labels("closed")
+DISCONNECTS_EVICTED = DISCONNECTS.labels("evicted")
+DISCONNECTS_LEAVE = DISCONNECTS.labels("leave")
+DISCONNECTS_RATE_LIMITED = DISCONNECTS.labels("rate_limited")
+RATE_LIMITED = REGISTRY.counter(
+    "impostor_ws_rate_limited_total", "Mensajes entrantes que excedieron un límite", ("scope",)
+)
+
+# Código de mensaje para avisar al cliente que excedió un límite (política "warn")
+RATE_LIMITED_CODE = 5
 
 
 class WebSocketRoutes:
     """Maneja las rutas de WebSocket"""
     
-    def __init__(self, room_manager: RoomManager):
+    def __init__(
+        self,
+        room_manager: RoomManager,
+        placement: Optional[RoomPlacement] = None,
+        admission: Optional[AdmissionService] = None,
+        relay: Optional[RoomRelay] = None
+    ):
         self.room_manager = room_manager
+        self.placement = placement
+        self.admission = admission or AdmissionService()
+        self.relay = relay
+        # Tareas que atienden a los jugadores conectados a otro proceso
+        self._relayed: Set[asyncio.Task] = set()
+        if relay is not None:
+            relay.on_join = self._join_relayed
     
     async def handle_connection(
         self,
         websocket: WebSocket,
         room_id: str,
-        player_name: Optional[str] = Query(None)
+        player_name: Optional[str] = Query(None),
+        resume_token: Optional[str] = Query(None)
     ) -> None:
         """
         Maneja la conexión de un jugador por WebSocket.
@@ -25,57 +71,325 @@ class WebSocketRoutes:
             websocket: Conexión WebSocket
             room_id: ID de la sala (opcional, genera una nueva si no existe)
             player_name: Nombre del jugador (requerido)
+            resume_token: Token para reanudar una sesión desconectada (opcional)
         """
         
-        # Validar nombre del jugador
+        # Admisión: todos los chequeos y reservas ocurren antes del accept y sin
+        # ceder el event loop, así dos uniones concurrentes no pueden
+        # sobrepasar el cupo de la sala ni el techo global
         if not player_name or player_name == "null":
+            await self._reject(websocket, INVALID_NAME)
             return None
         
-        # Obtener sala existente
         game_service = self.room_manager.get_room(room_id)
+        if game_service is None and self.placement is not None and not self.placement.is_local(room_id):
+            # La sala pertenece a otro nodo: redirigir antes del accept
+            await self._redirect_to_owner(websocket, room_id)
+            return None
+        if game_service is None and self.relay is not None and self.relay.enabled:
+            # La sala puede estar en otro proceso del mismo nodo
+            await self._serve_relayed(websocket, room_id, player_name, resume_token)
+            return None
         if game_service is None:
-            # Sala inexistente: cerrar conexión
-            try:
-                await websocket.close()
-            except:
-                pass
+            await self._reject(websocket, ROOM_NOT_FOUND)
             return None
         
-        # Crear jugador
-        player = Player(player_name)
-        connection_success = game_service.connect(player, websocket)
-        
-        if not connection_success:
+        if not self.admission.try_acquire():
+            await self._reject(websocket, SERVER_FULL)
             return None
         
         try:
-            await websocket.accept()
+            codec, subprotocol = negotiate_codec(websocket.scope.get("subprotocols", []))
+            connection = Connection(websocket, codec, name=player_name)
+            
+            # Reservar el lugar en la sala antes del accept
+            reason, player = self._admit(room_id, game_service, player_name, resume_token, connection)
+            if reason is not None:
+                await self._reject(websocket, reason)
+                return None
+            
+            await self._serve(websocket, room_id, game_service, player, connection, subprotocol)
+        finally:
+            self.admission.release()
+    
+    def _admit(
+        self,
+        room_id: str,
+        game_service: GameService,
+        player_name: str,
+        resume_token: Optional[str],
+        connection: Connection
+    ) -> Tuple[Optional[str], Optional[Player]]:
+        """
+        Reserva el lugar del jugador en la sala (sin ceder el event loop).
+        
+        Returns:
+            Tupla (motivo de rechazo o None, jugador admitido)
+        """
+        # Reanudar la sesión si el token es válido; si no, es un jugador nuevo
+        player = self.room_manager.resume_session(room_id, resume_token) if resume_token else None
+        if player is not None:
+            connection.name = player.name
+            if not game_service.reattach(player, connection):
+                return RESUME_INVALID, None
+            self.room_manager.session_resumed(resume_token)
+            CONNECTS_RESUME.inc()
+            return None, player
+        
+        reason = game_service.admission_error(player_name)
+        if reason == NAME_TAKEN and resume_token:
+            # Quiso reanudar con un token inválido o vencido: no es un
+            # choque de nombres con otro jugador
+            return RESUME_INVALID, None
+        if reason is not None:
+            return reason, None
+        player = Player(player_name)
+        game_service.connect(player, connection)
+        self.room_manager.open_session(room_id, player)
+        CONNECTS_NEW.inc()
+        return None, player
+    
+    async def _serve(
+        self,
+        websocket: WebSocket,
+        room_id: str,
+        game_service: GameService,
+        player: Player,
+        connection: Connection,
+        subprotocol: Optional[str]
+    ) -> None:
+        """Acepta la conexión con el lugar ya reservado y atiende sus mensajes"""
+        try:
+            await websocket.accept(subprotocol=subprotocol)
         except:
-            game_service.disconnect(player)
+            self.room_manager.detach_player(game_service, player, connection)
             self.room_manager.delete_room(room_id)
             return None
         
+        await self._run(room_id, game_service, player, connection)
+    
+    async def _run(
+        self,
+        room_id: str,
+        game_service: GameService,
+        player: Player,
+        connection: Connection
+    ) -> None:
+        """Atiende los mensajes de un jugador admitido (local o remoto)"""
+        # La tarea escritora drena la cola de salida; si la conexión se aborta
+        # (cliente lento o envío fallido) se cancela esta tarea para desalojarla
+        connection.start(owner=asyncio.current_task())
+        limiter = TokenBucket(WS_RATE_LIMIT, WS_RATE_BURST)
+        
         try:
-            # Enviar info de la sala al conectarse
-            await game_service.waiting()
+            # Enviar token de reanudación y snapshot de la sala al que se conecta;
+            # el resto recibe el delta (o nada, si reanudó)
+            await game_service.send_session(player, self.room_manager.resume_grace)
+            await game_service.send_snapshot(player)
+            # Si se reincorpora a una ronda en curso, reenviar su rol
+            await game_service.send_round_info(player)
             
             while True:
-                data = await websocket.receive_json()
-                print(f"[Sala {room_id}] Datos recibidos: {data}")
+                data = await connection.receive()
+                if not limiter.try_acquire():
+                    if await self._rate_limited(room_id, game_service, player, connection, "connection", limiter):
+                        return None
+                    continue
+                
+                game_service.touch()
+                if WS_LOG_SAMPLE and one_in_x(WS_LOG_SAMPLE) and logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Datos recibidos: %s", data, extra={"room_id": room_id, "player": player.name})
+                
+                if data.get("action") == "sync":
+                    await game_service.send_snapshot(player)
                 
-                if player.is_admin and data.get("action") == "next_round":
+                elif data.get("action") == "leave":
+                    # Salida explícita: no se conserva el lugar
+                    self.room_manager.remove_player(room_id, game_service, player)
+                    DISCONNECTS_LEAVE.inc()
+                    await connection.close()
+                    return None
+                
+                elif player.is_admin and data.get("action") == "next_round":
+                    if not game_service.round_limiter.try_acquire():
+                        if await self._rate_limited(
+                            room_id, game_service, player, connection, "room", game_service.round_limiter
+                        ):
+                            return None
+                        continue
                     if game_service.is_complete:
-                        print(f"[Sala {room_id}] Ejecutando nueva ronda")
+                        logger.info("Nueva ronda", extra={"room_id": room_id})
                         await game_service.new_round()
                     else:
                         await game_service.waiting()
         
         except WebSocketDisconnect:
-            print(f"[Sala {room_id}] SE DESCONECTO PLAYER: {player.name}")
-            game_service.disconnect(player)
-            await game_service.waiting()
-            
-            # Eliminar sala si está vacía
-            self.room_manager.delete_room(room_id)
+            logger.info("Jugador desconectado", extra={"room_id": room_id, "player": player.name})
+            DISCONNECTS_CLOSED.inc()
+            await self._leave(room_id, game_service, player, connection)
+            return None
+        
+        except asyncio.CancelledError:
+            if not connection.aborted:
+                raise
+            logger.info("Jugador desalojado", extra={"room_id": room_id, "player": player.name})
+            DISCONNECTS_EVICTED.inc()
+            await self._leave(room_id, game_service, player, connection)
             return None
+    
+    async def _serve_relayed(
+        self,
+        websocket: WebSocket,
+        room_id: str,
+        player_name: str,
+        resume_token: Optional[str]
+    ) -> None:
+        """
+        Atiende a un jugador cuya sala está en otro proceso.
+        
+        Este proceso solo hace de puente: la admisión a la sala, los límites de
+        mensajes y el heartbeat los aplica el proceso dueño. Aquí se reenvían
+        los mensajes del cliente y la cola de salida envía los frames del dueño.
+        """
+        if not self.admission.try_acquire():
+            await self._reject(websocket, SERVER_FULL)
+            return None
+        
+        try:
+            codec, subprotocol = negotiate_codec(websocket.scope.get("subprotocols", []))
+            connection = Connection(websocket, codec, name=player_name)
+            conn_id, reason = await self.relay.join(room_id, player_name, resume_token, connection)
+            if reason is not None:
+                await self._reject(websocket, reason)
+                return None
+            
+            code = None
+            try:
+                await websocket.accept(subprotocol=subprotocol)
+                connection.start(owner=asyncio.current_task())
+                # El dueño pudo pedir el cierre antes del accept
+                while not connection.aborted:
+                    await self.relay.forward(conn_id, await connection.receive())
+            except WebSocketDisconnect:
+                pass
+            except asyncio.CancelledError:
+                # Abortada por el dueño (cierre o desalojo) o por la cola de salida
+                if not connection.aborted:
+                    raise
+            except Exception:
+                # Falló el accept o el reenvío al dueño
+                pass
+            finally:
+                code = await self.relay.leave(conn_id)
+            await connection.close(code=code or 1000)
+        finally:
+            self.admission.release()
+    
+    async def _join_relayed(
+        self,
+        room_id: str,
+        player_name: str,
+        resume_token: Optional[str],
+        connection: Connection
+    ) -> Optional[str]:
+        """Admite en una sala local a un jugador conectado a otro proceso"""
+        game_service = self.room_manager.get_room(room_id)
+        if game_service is None:
+            return ROOM_NOT_FOUND
+        reason, player = self._admit(room_id, game_service, player_name, resume_token, connection)
+        if reason is not None:
+            return reason
+        task = asyncio.create_task(self._run(room_id, game_service, player, connection))
+        self._relayed.add(task)
+        task.add_done_callback(self._relayed.discard)
+        return None
+    
+    async def _rate_limited(
+        self,
+        room_id: str,
+        game_service: GameService,
+        player: Player,
+        connection: Connection,
+        scope: str,
+        bucket: TokenBucket
+    ) -> bool:
+        """
+        Aplica WS_RATE_POLICY a un mensaje que excedió un límite.
+        
+        El mensaje se descarta y se cede el event loop para que un cliente
+        abusivo no acapare el turno del resto de las salas. Retorna True si
+        el jugador fue desconectado.
+        """
+        RATE_LIMITED.labels(scope).inc()
+        if WS_RATE_POLICY == "disconnect":
+            logger.warning(
+                "Límite de mensajes excedido: desconectando",
+                extra={"room_id": room_id, "player": player.name, "scope": scope}
+            )
+            DISCONNECTS_RATE_LIMITED.inc()
+            await self._leave(room_id, game_service, player, connection, code=1008)
+            return True
+        if WS_RATE_POLICY == "warn" and bucket.rejected_streak == 1:
+            # Un aviso por racha de excesos, para no llenar la cola de salida
+            data = {"error": "rate_limited", "scope": scope, "retry_after": round(bucket.retry_after(), 3)}
+            await game_service.room_service.send_to_player(player, data, RATE_LIMITED_CODE)
+        await asyncio.sleep(0)
+        return False
+    
+    async def _reject(self, websocket: WebSocket, reason: str) -> None:
+        """
+        Rechaza una conexión antes del accept indicando el motivo.
+        
+        Si el servidor soporta respuestas HTTP en el handshake se responde con
+        el status del motivo y el header X-Reject-Reason; si no, se cierra con
+        el código WebSocket del motivo.
+        """
+        self.admission.record_rejection(reason)
+        close_code, status_code = REJECT_CODES[reason]
+        try:
+            if "websocket.http.response" in websocket.scope.get("extensions", {}):
+                await websocket.send_denial_response(
+                    Response(status_code=status_code, headers={"X-Reject-Reason": reason})
+                )
+            else:
+                await websocket.close(code=close_code, reason=reason)
+        except Exception:
+            pass
+    
+    async def _redirect_to_owner(self, websocket: WebSocket, room_id: str) -> None:
+        """Rechaza una conexión mal ruteada indicando el nodo dueño de la sala"""
+        owner = self.placement.owner(room_id)
+        owner_url = self.placement.owner_url(room_id)
+        try:
+            if owner_url and "websocket.http.response" in websocket.scope.get("extensions", {}):
+                location = owner_url.rstrip("/").replace("http", "ws", 1) + websocket.url.path
+                if websocket.url.query:
+                    location += f"?{websocket.url.query}"
+                await websocket.send_denial_response(
+                    Response(status_code=307, headers={"Location": location, "X-Room-Node": owner})
+                )
+            else:
+                await websocket.close(code=4003, reason=f"room owned by {owner}")
+        except Exception:
+            pass
+    
+    async def _leave(
+        self,
+        room_id: str,
+        game_service: GameService,
+        player: Player,
+        connection: Connection,
+        code: int = 1000
+    ) -> None:
+        """
+        Desconecta al jugador y cierra su conexión.
+        
+        El jugador conserva su lugar durante la ventana de gracia; si no reanuda,
+        el resto de la sala recibe el delta de salida al vencer.
+        """
+        self.room_manager.detach_player(game_service, player, connection)
+        await connection.close(code=code)
+        
+        # Eliminar sala si está vacía
+        self.room_manager.delete_room(room_id)
 
@@ -0,0 +1,39 @@
+from typing import Optional
+from pydantic import BaseModel, Field
+
+from app.config.settings import MAX_QUOTA_PLAYERS, ROOM_BATCH_MAX
+
+
+class RoomCreate(BaseModel):
+    """Schema para crear una sala"""
+    quota_players: Optional[int] = Field(
+        None, ge=2, le=MAX_QUOTA_PLAYERS, description="Jugadores por sala (por defecto el del servidor)"
+    )
+    character_pack: Optional[str] = Field(None, description="Pack de personajes (por defecto el del servidor)")
+    collection_id: Optional[int] = Field(
+        None, gt=0, description="Colección de personajes de la base de datos (excluyente con character_pack)"
+    )
+
+
+class RoomBatchCreate(RoomCreate):
+    """Schema para crear varias salas en una sola request"""
+    count: int = Field(..., ge=1, le=ROOM_BATCH_MAX, description="Cantidad de salas a crear")
+
+
+class RoomForwardCreate(RoomCreate):
+    """Schema interno: salas con IDs ya asignados que otro nodo del cluster reenvía a su dueño"""
+    room_ids: list[str] = Field(
+        ..., min_length=1, max_length=ROOM_BATCH_MAX, description="IDs de las salas (deben pertenecer a este nodo)"
+    )
+
+
+class RoomCreatedResponse(BaseModel):
+    """Schema de respuesta para una sala creada"""
+    room_id: str = Field(..., description="ID de la sala")
+    node_id: str = Field(..., description="Nodo dueño de la sala")
+    node_url: str = Field(..., description="URL base del nodo dueño")
+
+
+class RoomBatchResponse(BaseModel):
+    """Schema de respuesta para la creación de salas en lote"""
+    rooms: list[RoomCreatedResponse] = Field(..., description="Salas creadas")
@@ -0,0 +1,58 @@
+from typing import Dict
+
+from app.config.settings import MAX_CONNECTIONS
+
+# Motivos de rechazo antes del accept: motivo -> (código de cierre WebSocket,
+# status HTTP si el servidor soporta respuestas de rechazo en el handshake)
+INVALID_NAME = "invalid_name"
+ROOM_NOT_FOUND = "room_not_found"
+ROOM_FULL = "room_full"
+NAME_TAKEN = "name_taken"
+RESUME_INVALID = "resume_invalid"
+SERVER_FULL = "server_full"
+
+REJECT_CODES: Dict[str, tuple[int, int]] = {
+    INVALID_NAME: (4001, 400),
+    ROOM_NOT_FOUND: (4004, 404),
+    ROOM_FULL: (4005, 409),
+    NAME_TAKEN: (4006, 409),
+    RESUME_INVALID: (4007, 409),
+    SERVER_FULL: (4013, 503),
+}
+
+
+class AdmissionService:
+    """
+    Control de admisión de conexiones WebSocket.
+
+    Lleva la cuenta global de conexiones aceptadas (o en handshake) y el techo
+    MAX_CONNECTIONS. Reservar y liberar son sincrónicos: dentro del event loop
+    no hay otra conexión que pueda intercalarse entre el chequeo y la reserva.
+    """
+
+    def __init__(self, max_connections: int = MAX_CONNECTIONS):
+        self.max_connections = max_connections
+        self.active = 0
+        self.rejected: Dict[str, int] = {reason: 0 for reason in REJECT_CODES}
+
+    def try_acquire(self) -> bool:
+        """Reserva un lugar global. Retorna False si se alcanzó el techo"""
+        if self.max_connections > 0 and self.active >= self.max_connections:
+            return False
+        self.active += 1
+        return True
+
+    def release(self) -> None:
+        """Libera un lugar reservado con try_acquire()"""
+        self.active -= 1
+
+    def record_rejection(self, reason: str) -> None:
+        self.rejected[reason] += 1
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Conexiones activas y rechazos por motivo"""
+        stats = {"active_connections": self.active}
+        for reason, count in self.rejected.items():
+            stats[f"rejected_{reason}"] = count
+        return stats
@@ -0,0 +1,251 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from app.config.settings import NODE_ID, BACKPLANE, BACKPLANE_DIR
+
+logger = logging.getLogger(__name__)
+
+# Recibe un mensaje publicado o enviado por otro proceso. Siempre trae
+# "origin" (node_id del emisor) y "kind" (ver RoomRelay)
+MessageHandler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class Backplane(ABC):
+    """
+    Interfaz para intercambiar mensajes de sala entre procesos.
+    
+    Cada proceso puede publicar a todos los demás (nunca a sí mismo) o enviar
+    a un proceso puntual por su node_id. Los mensajes de un emisor a un mismo
+    destino llegan en orden. La interfaz es la de un pub/sub asíncrono, de
+    modo que un broker externo puede implementarla en lugar de las versiones
+    locales.
+    """
+
+    def __init__(self, node_id: str = NODE_ID):
+        self.node_id = node_id
+
+    @abstractmethod
+    async def start(self, handler: MessageHandler) -> None:
+        """Comienza a recibir mensajes de otros procesos"""
+        pass
+
+    @abstractmethod
+    async def publish(self, message: Dict[str, Any]) -> None:
+        """Publica un mensaje para el resto de los procesos"""
+        pass
+
+    @abstractmethod
+    async def send(self, node_id: str, message: Dict[str, Any]) -> None:
+        """Envía un mensaje a un proceso puntual (se descarta si no está)"""
+        pass
+
+    @abstractmethod
+    def has_peers(self) -> bool:
+        """Indica si hay otros procesos a los que publicar"""
+        pass
+
+    @abstractmethod
+    async def stop(self) -> None:
+        """Deja de recibir mensajes y libera recursos"""
+        pass
+
+
+class InProcessBackplane(Backplane):
+    """
+    Backplane dentro del mismo proceso.
+    
+    Con un único proceso no hay a quién reenviar. Varias instancias que
+    comparten el mismo `hub` se comportan como nodos distintos (útil para
+    pruebas locales de varios nodos).
+    """
+
+    def __init__(self, node_id: str = NODE_ID, hub: Optional[List["InProcessBackplane"]] = None):
+        super().__init__(node_id)
+        self.hub = hub if hub is not None else []
+        self._handler: Optional[MessageHandler] = None
+
+    async def start(self, handler: MessageHandler) -> None:
+        self._handler = handler
+        if self not in self.hub:
+            self.hub.append(self)
+
+    async def publish(self, message: Dict[str, Any]) -> None:
+        envelope = {**message, "origin": self.node_id}
+        for peer in list(self.hub):
+            if peer is not self and peer._handler is not None:
+                await peer._handler(envelope)
+
+    async def send(self, node_id: str, message: Dict[str, Any]) -> None:
+        for peer in list(self.hub):
+            if peer is not self and peer.node_id == node_id and peer._handler is not None:
+                await peer._handler({**message, "origin": self.node_id})
+                return
+
+    def has_peers(self) -> bool:
+        return any(peer is not self for peer in self.hub)
+
+    async def stop(self) -> None:
+        if self in self.hub:
+            self.hub.remove(self)
+        self._handler = None
+
+
+class UnixSocketBackplane(Backplane):
+    """
+    Backplane entre procesos de la misma máquina usando sockets Unix.
+    
+    Cada proceso escucha en `{directory}/{node_id}.sock` y publica a todos los
+    sockets del directorio. Los frames son JSON con un prefijo de 4 bytes con
+    el largo. La publicación nunca bloquea: si un par no drena su buffer se
+    descarta la conexión y se reintenta más tarde.
+    """
+
+    MAX_BUFFER = 4 * 1024 * 1024
+
+    def __init__(self, directory: str = BACKPLANE_DIR, node_id: str = NODE_ID, peer_refresh: float = 1.0):
+        super().__init__(node_id)
+        self.directory = directory
+        self.peer_refresh = peer_refresh
+        self._handler: Optional[MessageHandler] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._writers: Dict[str, asyncio.StreamWriter] = {}
+        # Conexiones en curso por par, para no abrir dos (y perder el orden)
+        self._connecting: Dict[str, asyncio.Future] = {}
+        self._failed: Dict[str, float] = {}
+        # Tareas que leen de cada par conectado (se cancelan al detener)
+        self._readers: Set[asyncio.Task] = set()
+        self._peers: List[str] = []
+        self._peers_refreshed_at = 0.0
+
+    @property
+    def socket_path(self) -> str:
+        return os.path.join(self.directory, f"{self.node_id}.sock")
+
+    async def start(self, handler: MessageHandler) -> None:
+        self._handler = handler
+        os.makedirs(self.directory, exist_ok=True)
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self._server = await asyncio.start_unix_server(self._handle_peer, path=self.socket_path)
+
+    async def _handle_peer(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Lee frames de un par y los entrega al handler"""
+        task = asyncio.current_task()
+        self._readers.add(task)
+        try:
+            while True:
+                header = await reader.readexactly(4)
+                payload = await reader.readexactly(int.from_bytes(header, "big"))
+                try:
+                    await self._handler(json.loads(payload))
+                except Exception as e:
+                    logger.error(f"Error entregando mensaje del backplane: {e}")
+        except (asyncio.IncompleteReadError, ConnectionError):
+            # Par desconectado
+            pass
+        finally:
+            self._readers.discard(task)
+            writer.close()
+
+    def _peer_paths(self) -> List[str]:
+        """Sockets de los otros procesos (se relee el directorio cada peer_refresh)"""
+        now = time.monotonic()
+        if now - self._peers_refreshed_at >= self.peer_refresh:
+            self._peers_refreshed_at = now
+            try:
+                names = os.listdir(self.directory)
+            except FileNotFoundError:
+                names = []
+            self._peers = [
+                os.path.join(self.directory, name)
+                for name in names
+                if name.endswith(".sock") and os.path.join(self.directory, name) != self.socket_path
+            ]
+        return self._peers
+
+    async def _get_writer(self, path: str) -> Optional[asyncio.StreamWriter]:
+        writer = self._writers.get(path)
+        if writer is not None and not writer.is_closing():
+            return writer
+        connecting = self._connecting.get(path)
+        if connecting is not None:
+            return await asyncio.shield(connecting)
+        failed_at = self._failed.get(path)
+        if failed_at is not None and time.monotonic() - failed_at < self.peer_refresh:
+            return None
+        connecting = self._connecting[path] = asyncio.get_running_loop().create_future()
+        writer = None
+        try:
+            _, writer = await asyncio.open_unix_connection(path)
+            self._failed.pop(path, None)
+            self._writers[path] = writer
+        except OSError:
+            self._failed[path] = time.monotonic()
+        finally:
+            del self._connecting[path]
+            connecting.set_result(writer)
+        return writer
+
+    def _drop_writer(self, path: str) -> None:
+        writer = self._writers.pop(path, None)
+        if writer is not None:
+            writer.close()
+        self._failed[path] = time.monotonic()
+
+    def _frame(self, message: Dict[str, Any]) -> bytes:
+        payload = json.dumps(
+            {**message, "origin": self.node_id}, separators=(",", ":"), ensure_ascii=False
+        ).encode("utf-8")
+        return len(payload).to_bytes(4, "big") + payload
+
+    async def _write(self, path: str, frame: bytes) -> None:
+        writer = await self._get_writer(path)
+        if writer is None:
+            return
+        if writer.transport.get_write_buffer_size() > self.MAX_BUFFER:
+            logger.warning(f"Par del backplane lento, descartando conexión: {path}")
+            self._drop_writer(path)
+            return
+        try:
+            writer.write(frame)
+        except (ConnectionError, RuntimeError):
+            self._drop_writer(path)
+
+    async def publish(self, message: Dict[str, Any]) -> None:
+        frame = self._frame(message)
+        for path in self._peer_paths():
+            await self._write(path, frame)
+
+    async def send(self, node_id: str, message: Dict[str, Any]) -> None:
+        await self._write(os.path.join(self.directory, f"{node_id}.sock"), self._frame(message))
+
+    def has_peers(self) -> bool:
+        return bool(self._peer_paths())
+
+    async def stop(self) -> None:
+        for path in list(self._writers):
+            self._drop_writer(path)
+        if self._server is not None:
+            self._server.close()
+            for task in list(self._readers):
+                task.cancel()
+            await asyncio.gather(*self._readers, return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self._handler = None
+
+
+def create_backplane(kind: str = BACKPLANE) -> Backplane:
+    """Crea el backplane configurado"""
+    if kind == "inprocess":
+        return InProcessBackplane()
+    if kind == "unix":
+        return UnixSocketBackplane()
+    raise ValueError(f"Backplane desconocido: {kind}")
@@ -5,6 +5,7 @@ from app.models.character_collection import CharacterCollection
 from app.models.character import Character
 from app.repositories.character_collection_repository import ICharacterCollectionRepository
 from app.repositories.character_repository import ICharacterRepository
+from app.services.collection_cache import CollectionCache
 
 logger = logging.getLogger(__name__)
 
@@ -15,10 +16,17 @@ class CharacterCollectionService:
     def __init__(
         self,
         collection_repository: ICharacterCollectionRepository,
-        character_repository: Optional[ICharacterRepository] = None
+        character_repository: Optional[ICharacterRepository] = None,
+        cache: Optional[CollectionCache] = None
     ):
         self.collection_repository = collection_repository
         self.character_repository = character_repository
+        # Cache de colecciones usada por las salas: se invalida en cada escritura
+        self.cache = cache
+
+    def _invalidate(self, collection_id: Optional[int]) -> None:
+        if self.cache is not None and collection_id is not None:
+            self.cache.invalidate(collection_id)
 
     def create_collection(
         self,
@@ -101,6 +109,7 @@ class CharacterCollectionService:
         )
         
         updated = self.collection_repository.update(collection_id, collection)
+        self._invalidate(collection_id)
         logger.info(f"Colección actualizada: {collection_id}")
         return updated
 
@@ -111,6 +120,7 @@ class CharacterCollectionService:
         
         deleted = self.collection_repository.delete(collection_id)
         if deleted:
+            self._invalidate(collection_id)
             logger.info(f"Colección eliminada: {collection_id}")
         return deleted
 
@@ -148,6 +158,7 @@ class CharacterCollectionService:
         )
         
         created = self.character_repository.create(character)
+        self._invalidate(collection_id)
         logger.info(f"Personaje '{created.name}' agregado a colección {collection_id}")
         return created
 
@@ -213,6 +224,7 @@ class CharacterCollectionService:
         )
         
         updated = self.character_repository.update(character_id, character)
+        self._invalidate(existing.collection_id)
         logger.info(f"Personaje actualizado: {character_id}")
         return updated
 
@@ -224,8 +236,11 @@ class CharacterCollectionService:
         if character_id <= 0:
             raise ValueError("El ID debe ser un número positivo")
         
+        # Colección del personaje, para invalidarla en la cache
+        existing = self.character_repository.read(character_id)
         deleted = self.character_repository.delete(character_id)
         if deleted:
+            self._invalidate(existing.collection_id if existing else None)
             logger.info(f"Personaje eliminado: {character_id}")
         return deleted
 
@@ -0,0 +1,189 @@
+import asyncio
+import logging
+import sys
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.config.settings import COLLECTION_CACHE_TTL, SHARED_PACKS_DIR
+from app.utils.string_table import SharedStringStore
+
+logger = logging.getLogger(__name__)
+
+# Personajes de una colección: tupla inmutable (o StringTable en memoria
+# compartida entre procesos) compartida por todas las salas
+CollectionCharacters = Sequence[str]
+
+
+def load_collection_characters(collection_id: int) -> Optional[CollectionCharacters]:
+    """Lee de la base de datos los nombres de los personajes de una colección (bloqueante)"""
+    from app.config.database import SessionLocal
+    from app.repositories.postgres_character_collection_repository import PostgresCharacterCollectionRepository
+
+    db = SessionLocal()
+    try:
+        collection = PostgresCharacterCollectionRepository(db).read(collection_id)
+        if collection is None:
+            return None
+        return tuple(sys.intern(character.name) for character in collection.characters)
+    finally:
+        db.close()
+
+
+class CollectionCache:
+    """
+    Cache en proceso de los personajes de cada colección de la base de datos.
+
+    Cada colección se guarda una sola vez como tupla y todas las salas que la
+    usan comparten esa copia. Las entradas vencen tras `ttl` segundos y se
+    invalidan al escribir la colección con CharacterCollectionService; las
+    vencidas que ninguna sala usa se quitan con evict_expired(). Las
+    salas leen con peek(), que nunca consulta la base: si la entrada venció o
+    fue invalidada, se recarga en segundo plano y mientras tanto la sala sigue
+    con la lista que ya tenía.
+
+    Con `shared`, la colección cargada se publica como tabla de strings
+    mapeada en memoria y los demás procesos la mapean (mientras no venza) en
+    lugar de consultar la base y guardar su propia copia.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[int], Optional[CollectionCharacters]] = load_collection_characters,
+        ttl: float = COLLECTION_CACHE_TTL,
+        shared: Optional[SharedStringStore] = None
+    ):
+        self.loader = loader
+        self.ttl = ttl
+        self.shared = shared
+        # collection_id -> (personajes o None si no existe, momento de carga)
+        self._entries: Dict[int, Tuple[Optional[CollectionCharacters], float]] = {}
+        self._loading: Dict[int, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, collection_id: int) -> Optional[CollectionCharacters]:
+        """
+        Retorna los personajes de la colección, cargándolos si no están o
+        vencieron. Retorna None si la colección no existe.
+        """
+        entry = self._entries.get(collection_id)
+        if entry is not None and time.monotonic() - entry[1] < self.ttl:
+            self.hits += 1
+            return entry[0]
+        self.misses += 1
+        return await self._load(collection_id)
+
+    def peek(self, collection_id: int) -> Optional[CollectionCharacters]:
+        """
+        Retorna los personajes en cache sin consultar la base de datos.
+
+        Si la entrada falta o venció, programa una recarga en segundo plano.
+        """
+        entry = self._entries.get(collection_id)
+        if entry is None or time.monotonic() - entry[1] >= self.ttl:
+            self._refresh_in_background(collection_id)
+        return entry[0] if entry is not None else None
+
+    def invalidate(self, collection_id: int) -> None:
+        """Marca la colección como vencida (se recarga en el próximo acceso)"""
+        entry = self._entries.get(collection_id)
+        if entry is not None:
+            self._entries[collection_id] = (entry[0], float("-inf"))
+        if self.shared is not None:
+            # Que ningún proceso vuelva a mapear la versión vieja
+            self.shared.discard(f"collection-{collection_id}")
+
+    async def _load(self, collection_id: int) -> Optional[CollectionCharacters]:
+        # Una sola consulta por colección aunque haya varios pedidos simultáneos
+        future = self._loading.get(collection_id)
+        if future is not None:
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._loading[collection_id] = future
+        try:
+            characters = await asyncio.to_thread(self._load_shared, collection_id)
+            previous = self._entries.get(collection_id)
+            if previous is not None and previous[0] == characters:
+                # Sin cambios: conservar la misma tupla compartida
+                characters = previous[0]
+            self._entries[collection_id] = (characters, time.monotonic())
+            future.set_result(characters)
+            return characters
+        except BaseException as e:
+            # Destrabar a los get() concurrentes también si esta carga se cancela
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                # Evitar el aviso de excepción no recuperada si nadie más esperaba
+                future.exception()
+            raise
+        finally:
+            del self._loading[collection_id]
+
+    def evict_expired(self, in_use: Iterable[int], now: Optional[float] = None) -> List[int]:
+        """
+        Quita las entradas vencidas de colecciones que no están en `in_use`.
+        Retorna los IDs quitados.
+
+        Las entradas de colecciones que alguna sala usa se conservan aunque
+        venzan, así peek() sigue teniendo la lista mientras se recarga.
+        """
+        if now is None:
+            now = time.monotonic()
+        in_use = set(in_use)
+        evicted = [
+            collection_id
+            for collection_id, (_, loaded_at) in self._entries.items()
+            if collection_id not in in_use
+            and collection_id not in self._loading
+            and now - loaded_at >= self.ttl
+        ]
+        for collection_id in evicted:
+            del self._entries[collection_id]
+        return evicted
+
+    def _load_shared(self, collection_id: int) -> Optional[CollectionCharacters]:
+        """Carga la colección, reusando la publicada por otro proceso si no venció (bloqueante)"""
+        if self.shared is None:
+            return self.loader(collection_id)
+        key = f"collection-{collection_id}"
+        table = self.shared.open(key, max_age=self.ttl)
+        if table is not None:
+            return table
+        characters = self.loader(collection_id)
+        if not characters:
+            return characters
+        try:
+            return self.shared.publish(key, characters)
+        except OSError as e:
+            logger.warning(f"No se pudo compartir la colección {collection_id}, se usa una copia local: {e}")
+            return characters
+
+    def _refresh_in_background(self, collection_id: int) -> None:
+        if collection_id in self._loading:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        loop.create_task(self._refresh(collection_id))
+
+    async def _refresh(self, collection_id: int) -> None:
+        try:
+            await self._load(collection_id)
+        except Exception as e:
+            logger.warning(f"No se pudo recargar la colección {collection_id}: {e}")
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            "cached_collections": len(self._entries),
+            "collection_cache_hits": self.hits,
+            "collection_cache_misses": self.misses
+        }
+
+
+# Cache compartida por el proceso (y entre workers con SHARED_PACKS_DIR)
+collection_cache = CollectionCache(shared=SharedStringStore(SHARED_PACKS_DIR) if SHARED_PACKS_DIR else None)
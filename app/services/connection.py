@@ -0,0 +1,170 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, Optional
+
+from fastapi import WebSocket
+
+from app.config.settings import WS_SEND_TIMEOUT, WS_QUEUE_SIZE, WS_QUEUE_POLICY
+from app.utils.codecs import Codec, Frame, DEFAULT_CODEC
+from app.utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+MESSAGES_RECEIVED = REGISTRY.counter("impostor_ws_messages_received_total", "Mensajes WebSocket recibidos")
+SEND_FAILURES = REGISTRY.counter("impostor_ws_send_failures_total", "Envíos WebSocket fallidos o vencidos")
+QUEUE_OVERFLOWS = REGISTRY.counter(
+    "impostor_ws_queue_overflows_total", "Conexiones desconectadas por cola de salida llena"
+)
+
+# Códigos de mensaje que pueden descartarse o fusionarse si el cliente es lento:
+# ping (0), estado de espera completo (1) y deltas (3). Si se pierde un delta,
+# el cliente detecta el salto de versión y pide un snapshot con "sync"
+COALESCIBLE_CODES = frozenset({0, 1, 3})
+
+QUEUE_POLICIES = ("drop_oldest", "coalesce", "disconnect")
+
+
+class Connection:
+    """
+    Conexión WebSocket de un jugador junto con su codec negociado.
+    
+    Los envíos no se hacen en línea: cada mensaje se encola en una cola acotada
+    que drena una tarea escritora propia de la conexión. Si la cola se llena se
+    aplica la política configurada; si un envío falla o excede el timeout, la
+    conexión se aborta y la tarea dueña (el handler) ejecuta la desconexión.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        codec: Codec = DEFAULT_CODEC,
+        name: str = "",
+        max_queue: int = WS_QUEUE_SIZE,
+        policy: str = WS_QUEUE_POLICY,
+        send_timeout: float = WS_SEND_TIMEOUT
+    ):
+        if policy not in QUEUE_POLICIES:
+            raise ValueError(f"Política de cola inválida: {policy}")
+        self.websocket = websocket
+        self.codec = codec
+        self.name = name
+        self.max_queue = max_queue
+        self.policy = policy
+        self.send_timeout = send_timeout
+        self.aborted = False
+        # Momento (monotonic) del último mensaje recibido del cliente
+        self.last_seen = time.monotonic()
+        self._queue: Deque[tuple[int, Frame]] = deque()
+        self._ready = asyncio.Event()
+        self._writer: Optional[asyncio.Task] = None
+        self._owner: Optional[asyncio.Task] = None
+
+    @property
+    def queue_size(self) -> int:
+        """Cantidad de frames pendientes de envío"""
+        return len(self._queue)
+
+    def encode(self, message: dict) -> Frame:
+        """Serializa un mensaje con el codec de la conexión"""
+        return self.codec.encode(message)
+
+    def start(self, owner: Optional[asyncio.Task] = None) -> None:
+        """Inicia la tarea escritora; owner es la tarea que se cancela al abortar"""
+        self._owner = owner
+        if self._writer is None:
+            self._writer = asyncio.create_task(self._write_loop())
+
+    def enqueue(self, frame: Frame, code_ws: int) -> None:
+        """Encola un frame aplicando la política de cola llena"""
+        if self.aborted:
+            return
+        if len(self._queue) >= self.max_queue and not self._make_room(code_ws):
+            logger.warning("Cola de salida llena: desconectando", extra={"player": self.name})
+            QUEUE_OVERFLOWS.inc()
+            self.abort()
+            return
+        self._queue.append((code_ws, frame))
+        self._ready.set()
+
+    def _make_room(self, code_ws: int) -> bool:
+        """Libera lugar en la cola según la política. Retorna False si no fue posible"""
+        if self.policy == "drop_oldest":
+            for index, (queued_code, _) in enumerate(self._queue):
+                if queued_code in COALESCIBLE_CODES:
+                    del self._queue[index]
+                    return True
+            return False
+        if self.policy == "coalesce":
+            # Conservar solo el estado de espera más reciente (o ninguno si llega uno nuevo)
+            keep_last = code_ws not in COALESCIBLE_CODES
+            coalesced: Deque[tuple[int, Frame]] = deque()
+            for item in reversed(self._queue):
+                if item[0] in COALESCIBLE_CODES:
+                    if not keep_last:
+                        continue
+                    keep_last = False
+                coalesced.appendleft(item)
+            self._queue = coalesced
+            return len(self._queue) < self.max_queue
+        return False
+
+    async def _write_loop(self) -> None:
+        """Drena la cola de salida enviando un frame a la vez"""
+        try:
+            while True:
+                while not self._queue:
+                    self._ready.clear()
+                    await self._ready.wait()
+                _, frame = self._queue.popleft()
+                await asyncio.wait_for(self.send_frame(frame), timeout=self.send_timeout)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.info("Error enviando frame: %r", e, extra={"player": self.name})
+            SEND_FAILURES.inc()
+            self._writer = None
+            self.abort()
+
+    async def send_frame(self, frame: Frame) -> None:
+        """Envía un frame ya serializado"""
+        if self.codec.binary:
+            await self.websocket.send_bytes(frame)
+        else:
+            await self.websocket.send_text(frame)
+
+    async def receive(self) -> Any:
+        """Recibe y deserializa el siguiente mensaje del cliente"""
+        if self.codec.binary:
+            frame = await self.websocket.receive_bytes()
+        else:
+            frame = await self.websocket.receive_text()
+        self.last_seen = time.monotonic()
+        MESSAGES_RECEIVED.inc()
+        return self.codec.decode(frame)
+
+    def abort(self) -> None:
+        """Marca la conexión como fallida y cancela la tarea dueña para desalojarla"""
+        if self.aborted:
+            return
+        self.aborted = True
+        self._queue.clear()
+        self.stop()
+        if self._owner is not None and self._owner is not asyncio.current_task():
+            self._owner.cancel()
+
+    def stop(self) -> None:
+        """Detiene la tarea escritora"""
+        if self._writer is not None:
+            if self._writer is not asyncio.current_task():
+                self._writer.cancel()
+            self._writer = None
+
+    async def close(self, code: int = 1000) -> None:
+        """Detiene la escritura y cierra el WebSocket sin bloquear más que el timeout"""
+        self.stop()
+        try:
+            await asyncio.wait_for(self.websocket.close(code=code), timeout=self.send_timeout)
+        except Exception:
+            pass
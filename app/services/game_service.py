@@ -1,18 +1,70 @@
-import random
-from typing import List, Optional, Dict, Any
+import asyncio
+import time
+from typing import Callable, List, Optional, Dict, Any
 
+from app.characters import PACKS
+from app.config.settings import WAITING_TICK, ROOM_ROUND_RATE, ROOM_ROUND_BURST
 from app.models.player import Player
+from app.services.admission_service import NAME_TAKEN, ROOM_FULL
+from app.services.collection_cache import CollectionCache
+from app.services.connection import Connection
 from app.services.room_service import RoomService
+from app.utils.deck import ShuffledDeck
+from app.utils.metrics import REGISTRY
+from app.utils.rate_limit import TokenBucket
+
+ROUNDS_STARTED = REGISTRY.counter("impostor_rounds_started_total", "Rondas iniciadas")
+PLAYERS_JOINED = REGISTRY.counter("impostor_players_joined_total", "Jugadores que se unieron a una sala")
+PLAYERS_LEFT = REGISTRY.counter("impostor_players_left_total", "Jugadores que dejaron una sala (salida o gracia vencida)")
 
 
 class GameService:
     """Servicio de lógica de negocio para el juego"""
     
-    def __init__(self, quota_players: int, characters: List[str]):
-        self.room_service = RoomService()
+    def __init__(
+        self,
+        quota_players: int,
+        characters: List[str],
+        waiting_tick: float = WAITING_TICK,
+        room_id: Optional[str] = None,
+        character_pack: Optional[str] = None,
+        collection_id: Optional[int] = None,
+        collection_cache: Optional[CollectionCache] = None
+    ):
+        self.room_service = RoomService(room_id=room_id)
         self.quota_players = quota_players
         self._current_character: Optional[str] = None
         self.characters = characters
+        # Nombre del pack de `characters` (se persiste en el snapshot)
+        self.character_pack = character_pack
+        # Colección de la base de datos de `characters` (se persiste en el
+        # snapshot). La lista se toma de la cache al iniciar cada ronda
+        self.collection_id = collection_id
+        self.collection_cache = collection_cache
+        # Mazo sobre los índices de `characters`: no se repite un personaje
+        # hasta agotarlos (la lista compartida no se copia)
+        self.deck = ShuffledDeck(len(characters))
+        # Versión del estado de espera y cambios pendientes de enviar (nombre -> op)
+        self.state_version = 0
+        self.waiting_tick = waiting_tick
+        self._pending_changes: Dict[str, str] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        # Ciclo de vida (time.monotonic) usado por RoomManager para expirar salas
+        self.created_at = time.monotonic()
+        self.last_activity = self.created_at
+        self.ever_joined = False
+        # Generación asignada por RoomManager al registrar la sala: distingue
+        # una sala de otra posterior con el mismo ID
+        self.generation = 0
+        # Nombres de los jugadores con rol en la ronda en curso
+        self._round_players: set[str] = set()
+        # Jugadores desconectados que conservan su lugar hasta reanudar o vencer
+        # su ventana de gracia (también los restaurados de un snapshot)
+        self._detached_players: Dict[str, Player] = {}
+        # Límite de rondas por segundo de la sala (next_round)
+        self.round_limiter = TokenBucket(ROOM_ROUND_RATE, ROOM_ROUND_BURST)
+        # Callback para avisar que el estado persistible cambió (snapshots)
+        self.on_change: Optional[Callable[[], None]] = None
     
     @property
     def players(self) -> List[Player]:
@@ -21,9 +73,19 @@ class GameService:
     
     @property
     def is_complete(self) -> bool:
-        """Verifica si la sala está completa"""
+        """Verifica si la sala está completa (todos conectados)"""
         return self.room_service.count_active_players == self.quota_players
     
+    @property
+    def is_full(self) -> bool:
+        """Verifica si no quedan lugares (contando los reservados para reanudar)"""
+        return self.count_members >= self.quota_players
+    
+    @property
+    def count_members(self) -> int:
+        """Jugadores conectados más desconectados en ventana de gracia"""
+        return self.room_service.count_active_players + len(self._detached_players)
+    
     @property
     def count_active_players(self) -> int:
         """Retorna cantidad de jugadores activos"""
@@ -37,83 +99,303 @@ class GameService:
     def current_character(self, new_character: Optional[str]):
         self._current_character = new_character
     
+    def mark_dirty(self) -> None:
+        """Avisa que el estado de la sala cambió y debe persistirse"""
+        if self.on_change is not None:
+            self.on_change()
+    
+    def touch(self) -> None:
+        """Registra actividad en la sala"""
+        self.last_activity = time.monotonic()
+    
     def clear_character(self):
         """Limpia el personaje actual"""
         self.current_character = None
     
     @property
     def have_admin(self) -> bool:
-        """Verifica si hay admin en la sala"""
-        return self.room_service.has_admin()
+        """Verifica si hay admin en la sala (puede estar en ventana de gracia)"""
+        if self.room_service.has_admin():
+            return True
+        return any(player.is_admin for player in self._detached_players.values())
     
     def clear_round(self):
         """Limpia el estado de la ronda"""
         self.clear_character()
+        self._round_players.clear()
         for player in self.players:
             player.clear_state()
     
     def assign_impostor(self) -> None:
         """Asigna aleatoriamente un impostor"""
-        if self.players:
-            impostor_player = random.choice(self.players)
+        impostor_player = self.room_service.random_player()
+        if impostor_player is not None:
             impostor_player.set_as_impostor()
     
     def assign_first(self) -> None:
         """Asigna aleatoriamente quién empieza"""
-        if self.players:
-            first_player = random.choice(self.players)
+        first_player = self.room_service.random_player()
+        if first_player is not None:
             first_player.is_first = True
     
     def assign_admin(self) -> None:
         """Asigna admin si no hay ninguno"""
-        if not self.players:
+        if self.have_admin:
             return
-        if not self.have_admin:
-            admin_player = random.choice(self.players)
-            admin_player.is_admin = True
+        admin_player = self.room_service.random_player()
+        if admin_player is not None:
+            self.room_service.set_admin(admin_player)
+            self.record_change(admin_player.name, "update")
     
     async def send_info_to_players(self) -> None:
         """Envía el estado de la ronda a todos los jugadores"""
-        for player in self.players:
-            data = player.info_in_round(self.current_character)
-            await self.room_service.send_to_player(player, data, 2)
+        messages = [
+            (player, player.info_in_round(self.current_character))
+            for player in self.players
+        ]
+        await self.room_service.send_many(messages, 2)
+    
+    def refresh_characters(self) -> None:
+        """
+        Toma de la cache la versión vigente de la colección de la sala.
+
+        Nunca consulta la base de datos: si la colección no está en cache (o
+        quedó vacía) se sigue con la lista actual.
+        """
+        if self.collection_id is None or self.collection_cache is None:
+            return
+        characters = self.collection_cache.peek(self.collection_id)
+        if characters:
+            self.characters = characters
     
     async def new_round(self) -> None:
         """Inicia una nueva ronda"""
+        self.touch()
         self.clear_round()
-        self.current_character = random.choice(self.characters)
+        self.refresh_characters()
+        self.current_character = self.characters[self.deck.draw(len(self.characters))]
         self.assign_impostor()
         self.assign_first()
+        self._round_players = {player.name for player in self.players}
+        self.mark_dirty()
+        ROUNDS_STARTED.inc()
         await self.send_info_to_players()
     
     @property
     def waiting_state(self) -> Dict[str, Any]:
-        """Retorna el estado de espera de la sala"""
+        """Retorna el estado de espera completo (snapshot) de la sala"""
         return {
+            "version": self.state_version,
             "quota_players": self.quota_players,
             "active_players": self.count_active_players,
-            "players": [player.info_in_room for player in self.players]
+            "players": self.room_service.players_info
         }
     
     async def waiting(self) -> None:
-        """Envía estado de espera a todos los jugadores"""
+        """Envía el snapshot del estado de espera a todos los jugadores"""
         await self.room_service.broadcast(self.waiting_state, 1)
     
+    async def send_round_info(self, player: Player) -> None:
+        """Reenvía la ronda en curso a un jugador que conserva su rol en ella"""
+        if self.current_character is not None and player.name in self._round_players:
+            await self.room_service.send_to_player(player, player.info_in_round(self.current_character), 2)
+    
+    async def send_session(self, player: Player, resume_grace: float) -> None:
+        """Envía al jugador su token para reanudar la sesión"""
+        data = {"resume_token": player.resume_token, "resume_grace": resume_grace}
+        await self.room_service.send_to_player(player, data, 4)
+    
+    async def send_snapshot(self, player: Player) -> None:
+        """Envía el snapshot del estado de espera a un jugador (al unirse o al pedir sync)"""
+        await self.room_service.send_to_player(player, self.waiting_state, 1)
+    
+    def record_change(self, name: str, op: str) -> None:
+        """
+        Registra un cambio del estado de espera para el próximo delta.
+        
+        Los cambios de un mismo jugador dentro de la ventana se fusionan:
+        "join" y "update" se envían con los datos actuales del jugador.
+        """
+        if op == "update" and self._pending_changes.get(name) == "join":
+            return
+        self._pending_changes[name] = op
+        self._schedule_flush()
+        self.mark_dirty()
+    
+    def _schedule_flush(self) -> None:
+        """Programa el envío del delta al cerrar la ventana de agrupamiento"""
+        if self._flush_task is not None:
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # Sin event loop (uso sincrónico): el delta se envía con flush_changes()
+            return
+        self._flush_task = asyncio.create_task(self._flush_after_tick())
+    
+    async def _flush_after_tick(self) -> None:
+        await asyncio.sleep(self.waiting_tick)
+        self._flush_task = None
+        await self.flush_changes()
+    
+    def build_delta(self) -> Optional[Dict[str, Any]]:
+        """Construye el delta con los cambios pendientes y avanza la versión"""
+        if not self._pending_changes:
+            return None
+        changes = []
+        for name, op in self._pending_changes.items():
+            player = self.room_service.get_player(name)
+            if op == "leave" or player is None:
+                changes.append({"op": "leave", "name": name})
+            else:
+                changes.append({"op": op, "player": player.info_in_room})
+        self._pending_changes.clear()
+        self.state_version += 1
+        return {
+            "version": self.state_version,
+            "base_version": self.state_version - 1,
+            "quota_players": self.quota_players,
+            "active_players": self.count_active_players,
+            "changes": changes
+        }
+    
+    async def flush_changes(self) -> None:
+        """Envía a todos los jugadores un único delta con los cambios agrupados"""
+        delta = self.build_delta()
+        if delta is not None:
+            await self.room_service.broadcast(delta, 3)
+    
     def disconnect(self, player: Player) -> None:
-        """Desconecta un jugador"""
+        """Desconecta un jugador definitivamente"""
         self.room_service.disconnect(player)
+        if self._detached_players.get(player.name) is player:
+            del self._detached_players[player.name]
+        self._player_removed(player)
+    
+    def _player_removed(self, player: Player) -> None:
+        """Actualiza la sala cuando un jugador deja de pertenecer a ella"""
+        self._round_players.discard(player.name)
+        PLAYERS_LEFT.inc()
+        self.touch()
+        self.record_change(player.name, "leave")
         if player.is_admin:
             self.assign_admin()
     
-    def connect(self, player: Player, websocket) -> bool:
+    def detach(self, player: Player, connection: Optional[Connection] = None) -> bool:
+        """
+        Desconecta un jugador conservando su lugar, rol y admin para reanudar.
+        
+        No se avisa al resto de la sala. Retorna False si el jugador ya no
+        estaba conectado por esa conexión (por ejemplo, ya reanudó en otra).
+        """
+        if not self.room_service.disconnect(player, connection):
+            return False
+        self._detached_players[player.name] = player
+        self.touch()
+        self.mark_dirty()
+        return True
+    
+    def reattach(self, player: Player, connection: Connection) -> bool:
+        """
+        Reanuda la sesión de un jugador con una nueva conexión.
+        
+        Si la conexión anterior sigue abierta (el cliente se reconectó antes de
+        que se detecte la caída), se reemplaza y se aborta la anterior.
+        """
+        if self._detached_players.get(player.name) is player:
+            del self._detached_players[player.name]
+            self.room_service.connect(player, connection)
+        else:
+            previous = self.room_service.replace_connection(player, connection)
+            if previous is None:
+                return False
+            previous.abort()
+        self.touch()
+        self.mark_dirty()
+        return True
+    
+    def remove_detached(self, player: Player) -> None:
+        """Elimina a un jugador cuya ventana de gracia venció"""
+        if self._detached_players.get(player.name) is player:
+            del self._detached_players[player.name]
+            self._player_removed(player)
+    
+    def admission_error(self, name: str) -> Optional[str]:
+        """Motivo por el que un jugador nuevo no puede unirse, o None si puede"""
+        if self.is_full:
+            return ROOM_FULL
+        if self.room_service.get_player(name) is not None or name in self._detached_players:
+            # Nombre en uso (o reservado para un jugador que puede reanudar)
+            return NAME_TAKEN
+        return None
+    
+    def connect(self, player: Player, connection: Connection) -> bool:
         """Conecta un nuevo jugador a la sala"""
-        if self.is_complete:
-            print("Sala llena")
+        if self.admission_error(player.name) is not None:
             return False
         
-        connected = self.room_service.connect(player, websocket)
+        connected = self.room_service.connect(player, connection)
         if not connected:
             return False
         
+        self.ever_joined = True
+        PLAYERS_JOINED.inc()
+        self.touch()
+        self.record_change(player.name, "join")
         self.assign_admin()
         return True
+    
+    def snapshot_state(self) -> Dict[str, Any]:
+        """Estado persistible de la sala"""
+        players = list(self._detached_players.values()) + self.players
+        return {
+            "quota_players": self.quota_players,
+            "character_pack": self.character_pack,
+            "collection_id": self.collection_id,
+            "current_character": self.current_character,
+            "state_version": self.state_version,
+            "players": [
+                {
+                    "name": player.name,
+                    "role": player.role,
+                    "is_first": player.is_first,
+                    "is_admin": player.is_admin,
+                    "resume_token": player.resume_token
+                }
+                for player in players
+            ]
+        }
+    
+    def restore_state(self, state: Dict[str, Any]) -> None:
+        """
+        Restaura la sala desde un snapshot.
+        
+        Los jugadores quedan desconectados; al reanudar con su resume_token
+        recuperan su rol, si empiezan y si son admin.
+        """
+        self.quota_players = state["quota_players"]
+        character_pack = state.get("character_pack")
+        if character_pack in PACKS:
+            self.character_pack = character_pack
+            self.characters = PACKS[character_pack]
+        self.collection_id = state.get("collection_id")
+        self.current_character = state["current_character"]
+        self.state_version = state["state_version"]
+        self.ever_joined = True
+        if self.current_character is not None:
+            self._round_players = {data["name"] for data in state["players"]}
+        for data in state["players"]:
+            if not data.get("resume_token"):
+                # Sin token no puede reanudar: no se le reserva lugar
+                continue
+            player = Player(data["name"])
+            player.role = data["role"]
+            player.is_first = data["is_first"]
+            player.is_admin = data["is_admin"]
+            player.resume_token = data.get("resume_token")
+            self._detached_players[player.name] = player
+    
+    @property
+    def detached_players(self) -> List[Player]:
+        """Jugadores desconectados en ventana de gracia"""
+        return list(self._detached_players.values())
@@ -0,0 +1,79 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+
+from app.config.settings import HEARTBEAT_INTERVAL, HEARTBEAT_TIMEOUT
+from app.services.room_manager import RoomManager
+from app.utils.codecs import Frame
+
+logger = logging.getLogger(__name__)
+
+PING_CODE = 0
+
+
+class HeartbeatService:
+    """
+    Envía pings a las conexiones inactivas y desaloja a las que no responden.
+    
+    Una conexión se considera viva mientras el cliente envíe cualquier mensaje
+    (por ejemplo {"action": "pong"}). Las conexiones silenciosas por más de
+    `timeout` segundos se abortan, lo que ejecuta el camino normal de
+    desconexión (GameService.disconnect) y libera el lugar en la sala.
+    """
+
+    def __init__(
+        self,
+        room_manager: RoomManager,
+        interval: float = HEARTBEAT_INTERVAL,
+        timeout: float = HEARTBEAT_TIMEOUT
+    ):
+        self.room_manager = room_manager
+        self.interval = interval
+        self.timeout = timeout
+        self.reaped = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Inicia el ciclo de heartbeat en segundo plano"""
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Detiene el ciclo de heartbeat"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error(f"Error en heartbeat: {e}")
+
+    def sweep(self) -> int:
+        """Envía pings y desaloja conexiones silenciosas. Retorna cuántas desalojó"""
+        now = time.monotonic()
+        ping = {"code_ws": PING_CODE, "data": {"ts": time.time()}}
+        frames: Dict[str, Frame] = {}
+        reaped = 0
+        for game_service in self.room_manager.active_rooms.values():
+            for connection in game_service.room_service.connections:
+                idle = now - connection.last_seen
+                if idle >= self.timeout:
+                    connection.abort()
+                    reaped += 1
+                elif idle >= self.interval:
+                    codec = connection.codec
+                    frame = frames.get(codec.name)
+                    if frame is None:
+                        frame = frames[codec.name] = codec.encode(ping)
+                    connection.enqueue(frame, PING_CODE)
+        self.reaped += reaped
+        return reaped
@@ -0,0 +1,84 @@
+import asyncio
+import logging
+import os
+from typing import Optional
+
+from watchfiles import Change, awatch
+
+from app.characters import PACKS
+from app.characters.registry import PackRegistry, load_pack_file
+from app.services.room_manager import RoomManager
+
+logger = logging.getLogger(__name__)
+
+
+class PackWatcherService:
+    """
+    Observa el directorio de packs y recarga los que cambian sin reiniciar.
+
+    El archivo se lee en un hilo aparte y la nueva tupla reemplaza a la
+    anterior en el registro y en las salas que usan el pack (copy-on-write).
+    La ronda en curso conserva su personaje; el pack nuevo se usa desde la
+    próxima ronda. Un archivo inválido se ignora y se sigue con la versión
+    anterior.
+    """
+
+    def __init__(self, room_manager: RoomManager, registry: PackRegistry = PACKS):
+        self.room_manager = room_manager
+        self.registry = registry
+        self._task: Optional[asyncio.Task] = None
+        self._stop_event: Optional[asyncio.Event] = None
+
+    def start(self) -> None:
+        """Inicia la observación en segundo plano (si el directorio existe)"""
+        directory = self.registry.directory
+        if not directory or not os.path.isdir(directory) or self._task is not None:
+            return
+        self._stop_event = asyncio.Event()
+        self._task = asyncio.create_task(self._run(directory))
+        logger.info(f"Observando packs de personajes en {directory}")
+
+    async def stop(self) -> None:
+        """Detiene la observación"""
+        if self._task is not None:
+            self._stop_event.set()
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self, directory: str) -> None:
+        async for changes in awatch(directory, stop_event=self._stop_event, recursive=False):
+            # Último cambio de cada archivo del lote
+            latest = {path: change for change, path in changes}
+            for path, change in sorted(latest.items()):
+                try:
+                    await self.apply_change(path, change)
+                except Exception as e:
+                    logger.error(f"Error recargando el pack {path}: {e}")
+
+    async def apply_change(self, path: str, change: Change) -> None:
+        """Aplica el cambio de un archivo del directorio de packs"""
+        name = self.registry.pack_name(path)
+        if name is None:
+            return
+
+        if change == Change.deleted or not os.path.isfile(path):
+            if self.registry.remove_file(path) is not None:
+                logger.info(f"Pack de personajes eliminado: {name} (las salas que lo usan lo conservan)")
+            return
+
+        self.registry.add_file(path)
+        if not self.registry.is_loaded(name):
+            # Nadie lo usa todavía: se lee recién cuando una sala lo pida
+            return
+        try:
+            characters = await asyncio.to_thread(load_pack_file, path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Pack de personajes inválido, se conserva la versión anterior: {e}")
+            return
+        characters = self.registry.swap(name, characters)
+        rooms = self.room_manager.swap_pack(name, characters)
+        logger.info(f"Pack de personajes recargado: {name} ({len(characters)} personajes, {rooms} salas)")
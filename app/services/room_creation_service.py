@@ -0,0 +1,91 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Sequence
+
+import requests
+
+from app.config.settings import CLUSTER_FORWARD_TIMEOUT
+from app.services.room_manager import RoomManager
+from app.services.room_placement import RoomPlacement
+
+logger = logging.getLogger(__name__)
+
+
+class RoomCreationService:
+    """
+    Crea salas en el nodo que indica el hash de su ID.
+
+    El nodo que recibe el pedido genera los IDs; las salas cuyo dueño es este
+    nodo se crean aquí y el resto se reenvía al dueño (POST /internal/rooms
+    con los IDs ya asignados), un pedido por nodo. Las salas locales se crean
+    primero, así un pack o colección inválidos se rechazan antes de reenviar.
+    Si un reenvío falla, las salas locales se deshacen; las que otros dueños
+    ya crearon vencen sin uso (UNUSED_ROOM_TTL).
+    """
+
+    def __init__(
+        self,
+        room_manager: RoomManager,
+        placement: RoomPlacement,
+        timeout: float = CLUSTER_FORWARD_TIMEOUT
+    ):
+        self.room_manager = room_manager
+        self.placement = placement
+        self.timeout = timeout
+
+    async def create_rooms(
+        self,
+        count: int,
+        quota_players: Optional[int] = None,
+        character_pack: Optional[str] = None,
+        collection_id: Optional[int] = None,
+        room_ids: Optional[Sequence[str]] = None
+    ) -> List[str]:
+        """
+        Crea `count` salas (o las de `room_ids`, reenviadas por otro nodo) y
+        retorna sus IDs.
+
+        Raises:
+            ValueError: Si los datos de la sala no son válidos (aquí o en el
+                nodo dueño)
+            RuntimeError: Si no se pudo leer la colección (aquí o en el nodo dueño)
+            ConnectionError: Si no se pudo reenviar la creación a un nodo dueño
+        """
+        spec = {"quota_players": quota_players, "character_pack": character_pack, "collection_id": collection_id}
+        if room_ids is not None:
+            # Reenviadas por otro nodo: deben ser de este
+            return await self.room_manager.create_rooms(len(room_ids), room_ids=room_ids, **spec)
+
+        room_ids = [self.room_manager.new_room_id() for _ in range(count)]
+        groups = self.placement.group_by_owner(room_ids)
+        local = groups.pop(self.placement.node_id, [])
+        if local:
+            await self.room_manager.create_rooms(len(local), room_ids=local, **spec)
+        results = await asyncio.gather(*(
+            asyncio.to_thread(self._forward, node_id, node_room_ids, spec)
+            for node_id, node_room_ids in groups.items()
+        ), return_exceptions=True)
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if errors:
+            for room_id in local:
+                self.room_manager.delete_room(room_id)
+            raise errors[0]
+        return room_ids
+
+    def _forward(self, node_id: str, room_ids: List[str], spec: Dict[str, Any]) -> None:
+        """Pide al nodo dueño que cree sus salas (bloqueante)"""
+        url = self.placement.nodes.get(node_id, "")
+        if not url:
+            raise ConnectionError(f"El nodo {node_id} no tiene URL en CLUSTER_NODES")
+        body = {**spec, "room_ids": room_ids}
+        try:
+            response = requests.post(f"{url.rstrip('/')}/internal/rooms", json=body, timeout=self.timeout)
+        except requests.RequestException as e:
+            logger.warning(f"No se pudo reenviar la creación de salas al nodo {node_id}: {e}")
+            raise ConnectionError(f"El nodo {node_id} no responde") from e
+        if response.status_code == 400:
+            raise ValueError(response.json().get("detail", ""))
+        if response.status_code == 503:
+            raise RuntimeError(response.json().get("detail", ""))
+        if response.status_code != 200:
+            raise ConnectionError(f"El nodo {node_id} respondió {response.status_code}: {response.text}")
@@ -1,16 +1,90 @@
-import uuid
-from typing import Dict, Optional
+import asyncio
+import heapq
+import itertools
+import logging
+import secrets
+import time
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Sequence
 
+from app.characters import PACKS
+from app.config.settings import (
+    UNUSED_ROOM_TTL, IDLE_ROOM_TTL, RESUME_GRACE, ROOM_ID_PREFIX, ROOM_BATCH_CHUNK, PACK_IDLE_TTL
+)
+from app.models.player import Player
+from app.services.collection_cache import CollectionCache
+from app.services.connection import Connection
 from app.services.game_service import GameService
+from app.services.room_placement import RoomPlacement
+from app.utils.metrics import REGISTRY
+from app.utils.room_ids import RoomIdAllocator
+
+logger = logging.getLogger(__name__)
+
+ROOMS_CREATED = REGISTRY.counter("impostor_rooms_created_total", "Salas creadas")
+ROOMS_DELETED = REGISTRY.counter("impostor_rooms_deleted_total", "Salas eliminadas", ("reason",))
+ROOMS_DELETED_EMPTY = ROOMS_DELETED.labels("empty")
+ROOMS_DELETED_UNUSED = ROOMS_DELETED.labels("unused")
+ROOMS_DELETED_IDLE = ROOMS_DELETED.labels("idle")
+ROOMS = REGISTRY.gauge("impostor_rooms", "Salas activas")
+PLAYERS_ACTIVE = REGISTRY.gauge("impostor_players_active", "Jugadores conectados")
+PLAYERS_DETACHED = REGISTRY.gauge("impostor_players_detached", "Jugadores desconectados en ventana de gracia")
+# Distribución actual de jugadores por sala: salas con a lo sumo `le`
+# jugadores (conectados más en ventana de gracia). Es una foto de cada
+# exportación, por eso son gauges y no un histograma acumulado
+ROOM_PLAYERS_BUCKETS = (0, 1, 2, 3, 4, 5, 6, 8, 10, 15, 20, 50, 100, 1000)
+ROOMS_BY_PLAYERS = REGISTRY.gauge(
+    "impostor_rooms_by_players",
+    "Salas con a lo sumo `le` jugadores (conectados más en ventana de gracia)",
+    ("le",)
+)
+ROOMS_BY_PLAYERS_BUCKETS = [
+    ROOMS_BY_PLAYERS.labels(str(bound)) for bound in ROOM_PLAYERS_BUCKETS
+] + [ROOMS_BY_PLAYERS.labels("+Inf")]
 
 
 class RoomManager:
     """Gestor centralizado de salas de juego"""
     
-    def __init__(self, quota_players: int, characters: list[str]):
+    def __init__(
+        self,
+        quota_players: int,
+        characters: list[str],
+        unused_room_ttl: float = UNUSED_ROOM_TTL,
+        idle_room_ttl: float = IDLE_ROOM_TTL,
+        placement: Optional[RoomPlacement] = None,
+        resume_grace: float = RESUME_GRACE,
+        id_allocator: Optional[RoomIdAllocator] = None,
+        collection_cache: Optional[CollectionCache] = None,
+        default_pack: Optional[str] = None
+    ):
         self._rooms: Dict[str, GameService] = {}
+        self.id_allocator = id_allocator or RoomIdAllocator(ROOM_ID_PREFIX)
         self.quota_players = quota_players
+        self.placement = placement
         self.characters = characters
+        # Pack de `characters` (no se descarga mientras sea el de por defecto)
+        self.default_pack = default_pack
+        # Cache de colecciones de la base de datos (salas con collection_id)
+        self.collection_cache = collection_cache
+        self.unused_room_ttl = unused_room_ttl
+        self.idle_room_ttl = idle_room_ttl
+        # Índice de expiración: heap de (vencimiento, secuencia, room_id,
+        # generación). Guarda solo el ID para no retener salas eliminadas; la
+        # generación descarta las entradas de una sala anterior con el mismo
+        # ID. Las entradas se validan al salir del heap; si la sala tuvo
+        # actividad se reprograman, así tocar una sala no cuesta nada.
+        self._expiry_heap: List[tuple[float, int, str, int]] = []
+        self._expiry_seq = itertools.count()
+        self._generations = itertools.count(1)
+        self.rooms_reclaimed_unused = 0
+        self.rooms_reclaimed_idle = 0
+        # Salas cuyo estado cambió desde el último snapshot
+        self._dirty_rooms: set[str] = set()
+        # Índice de sesiones reanudables: token -> (room_id, jugador)
+        self.resume_grace = resume_grace
+        self._sessions: Dict[str, tuple[str, Player]] = {}
+        self._session_timers: Dict[str, asyncio.TimerHandle] = {}
     
     def get_or_create_room(self, room_id: Optional[str] = None) -> tuple[str, GameService]:
         """
@@ -23,18 +97,164 @@ class RoomManager:
             Tupla (room_id, GameService)
         """
         if room_id is None:
-            # Generar nuevo ID de sala
-            room_id = str(uuid.uuid4())[:8]
+            room_id = self.new_room_id()
         
         if room_id not in self._rooms:
             # Crear nueva sala
-            self._rooms[room_id] = GameService(
-                quota_players=self.quota_players,
-                characters=self.characters
-            )
+            self._add_room(room_id, self._new_game_service(room_id))
+            ROOMS_CREATED.inc()
         
         return room_id, self._rooms[room_id]
     
+    async def create_rooms(
+        self,
+        count: int,
+        quota_players: Optional[int] = None,
+        character_pack: Optional[str] = None,
+        collection_id: Optional[int] = None,
+        chunk_size: int = ROOM_BATCH_CHUNK,
+        room_ids: Optional[Sequence[str]] = None
+    ) -> List[str]:
+        """
+        Crea `count` salas nuevas y retorna sus IDs.
+        
+        Con `collection_id`, los personajes salen de esa colección de la base
+        de datos (una sola copia en cache compartida por todas las salas).
+        Con `room_ids`, se crean salas con esos IDs (ya asignados por otro
+        nodo) en lugar de generarlos. Se cede el event loop cada `chunk_size`
+        salas para que un lote grande no frene a las partidas en curso.
+        
+        Raises:
+            ValueError: Si el pack de personajes no existe, la colección no
+                existe o no tiene personajes, o algún ID de `room_ids` es
+                inválido, está repetido, ya existe o pertenece a otro nodo
+            RuntimeError: Si no se pudo leer la colección (base de datos caída)
+        """
+        if character_pack is not None and character_pack not in PACKS:
+            raise ValueError(f"Pack de personajes desconocido: {character_pack}")
+        if room_ids is not None:
+            count = len(room_ids)
+            if len(set(room_ids)) != count:
+                raise ValueError("Hay IDs de sala repetidos")
+            for room_id in room_ids:
+                if not self.id_allocator.is_valid(room_id):
+                    raise ValueError(f"ID de sala inválido: {room_id[:32]!r}")
+                if room_id in self._rooms:
+                    raise ValueError(f"La sala {room_id} ya existe")
+                if self.placement is not None and not self.placement.is_local(room_id):
+                    raise ValueError(f"La sala {room_id} pertenece al nodo {self.placement.owner(room_id)}")
+        
+        characters = None
+        if collection_id is not None:
+            if character_pack is not None:
+                raise ValueError("character_pack y collection_id son excluyentes")
+            characters = await self._collection_characters(collection_id)
+        
+        created = []
+        for i in range(count):
+            if i and i % chunk_size == 0:
+                await asyncio.sleep(0)
+            room_id = room_ids[i] if room_ids is not None else self.new_room_id()
+            game_service = self._new_game_service(room_id, quota_players, character_pack, collection_id, characters)
+            self._add_room(room_id, game_service)
+            created.append(room_id)
+        ROOMS_CREATED.inc(count)
+        return created
+    
+    async def _collection_characters(self, collection_id: int) -> Sequence[str]:
+        if self.collection_cache is None:
+            raise ValueError("Las salas con colección no están habilitadas")
+        try:
+            characters = await self.collection_cache.get(collection_id)
+        except Exception as e:
+            logger.error(f"No se pudo cargar la colección {collection_id}: {e}")
+            raise RuntimeError(f"No se pudo cargar la colección {collection_id}") from e
+        if not characters:
+            raise ValueError(f"Colección {collection_id} no existe o no tiene personajes")
+        return characters
+    
+    def new_room_id(self) -> str:
+        """
+        Genera un ID de sala libre en este proceso. Con cluster, el dueño de
+        la sala es el nodo que indique el hash del ID (puede no ser este)
+        """
+        return self.id_allocator.allocate(self.room_exists)
+    
+    def _new_game_service(
+        self,
+        room_id: str,
+        quota_players: Optional[int] = None,
+        character_pack: Optional[str] = None,
+        collection_id: Optional[int] = None,
+        characters: Optional[Sequence[str]] = None
+    ) -> GameService:
+        if characters is None:
+            characters = PACKS[character_pack] if character_pack else self.characters
+        return GameService(
+            quota_players=quota_players or self.quota_players,
+            characters=characters,
+            room_id=room_id,
+            character_pack=character_pack,
+            collection_id=collection_id,
+            collection_cache=self.collection_cache
+        )
+    
+    def _add_room(self, room_id: str, game_service: GameService) -> None:
+        game_service.on_change = lambda: self._dirty_rooms.add(room_id)
+        game_service.generation = next(self._generations)
+        self._rooms[room_id] = game_service
+        self._schedule_expiry(room_id, game_service)
+        self._dirty_rooms.add(room_id)
+    
+    def restore_rooms(self, states: Dict[str, Dict[str, Any]]) -> None:
+        """Recrea las salas a partir de sus snapshots (al iniciar el proceso)"""
+        for room_id, state in states.items():
+            game_service = self._new_game_service(room_id)
+            game_service.restore_state(state)
+            self._add_room(room_id, game_service)
+            for player in game_service.detached_players:
+                if player.resume_token:
+                    self._sessions[player.resume_token] = (room_id, player)
+                    self._schedule_session_expiry(player.resume_token)
+        self._dirty_rooms.clear()
+    
+    async def warm_collections(self) -> int:
+        """
+        Carga en cache las colecciones de las salas existentes (tras restaurar
+        snapshots) para que su primera ronda ya use la colección.
+        
+        Returns:
+            Cantidad de colecciones cargadas
+        """
+        if self.collection_cache is None:
+            return 0
+        collection_ids = {
+            game_service.collection_id
+            for game_service in self._rooms.values()
+            if game_service.collection_id is not None
+        }
+        for collection_id in collection_ids:
+            try:
+                await self.collection_cache.get(collection_id)
+            except Exception as e:
+                logger.warning(f"No se pudo cargar la colección {collection_id}: {e}")
+        for game_service in self._rooms.values():
+            game_service.refresh_characters()
+        return len(collection_ids)
+    
+    def pop_dirty_rooms(self) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Retorna el estado de las salas modificadas desde la última llamada.
+        
+        Las salas eliminadas se retornan con estado None.
+        """
+        dirty = {}
+        for room_id in self._dirty_rooms:
+            game_service = self._rooms.get(room_id)
+            dirty[room_id] = game_service.snapshot_state() if game_service else None
+        self._dirty_rooms.clear()
+        return dirty
+    
     def get_room(self, room_id: str) -> Optional[GameService]:
         """Obtiene una sala existente"""
         return self._rooms.get(room_id)
@@ -43,12 +263,198 @@ class RoomManager:
         """Verifica si una sala existe"""
         return room_id in self._rooms
     
+    def open_session(self, room_id: str, player: Player) -> str:
+        """Emite el resume_token de un jugador recién conectado"""
+        token = secrets.token_urlsafe(16)
+        player.resume_token = token
+        self._sessions[token] = (room_id, player)
+        return token
+    
+    def resume_session(self, room_id: str, token: str) -> Optional[Player]:
+        """Busca (O(1)) el jugador de un resume_token válido para la sala"""
+        entry = self._sessions.get(token)
+        if entry is None or entry[0] != room_id:
+            return None
+        return entry[1]
+    
+    def session_resumed(self, token: str) -> None:
+        """Cancela el vencimiento de una sesión reanudada"""
+        handle = self._session_timers.pop(token, None)
+        if handle is not None:
+            handle.cancel()
+    
+    def detach_player(self, game_service: GameService, player: Player, connection: Connection) -> None:
+        """
+        Desconecta un jugador dejándolo reanudar durante la ventana de gracia.
+        
+        Sin token o sin ventana de gracia, la desconexión es definitiva.
+        """
+        if not game_service.detach(player, connection):
+            return
+        if player.resume_token is None or self.resume_grace <= 0:
+            game_service.remove_detached(player)
+            self.close_session(player)
+            return
+        self._schedule_session_expiry(player.resume_token)
+    
+    def remove_player(self, room_id: str, game_service: GameService, player: Player) -> None:
+        """Saca a un jugador de la sala definitivamente"""
+        game_service.disconnect(player)
+        self.close_session(player)
+        self.delete_room(room_id)
+    
+    def close_session(self, player: Player) -> None:
+        """Invalida el resume_token de un jugador"""
+        if player.resume_token is None:
+            return
+        self.session_resumed(player.resume_token)
+        self._sessions.pop(player.resume_token, None)
+    
+    def _schedule_session_expiry(self, token: str) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self.session_resumed(token)
+        self._session_timers[token] = loop.call_later(self.resume_grace, self._expire_session, token)
+    
+    def _expire_session(self, token: str) -> None:
+        """Vence la ventana de gracia: el jugador sale de la sala"""
+        self._session_timers.pop(token, None)
+        entry = self._sessions.pop(token, None)
+        if entry is None:
+            return
+        room_id, player = entry
+        game_service = self._rooms.get(room_id)
+        if game_service is not None:
+            game_service.remove_detached(player)
+            self.delete_room(room_id)
+    
     def delete_room(self, room_id: str) -> None:
         """Elimina una sala (cuando queda vacía)"""
         if room_id in self._rooms:
             game_service = self._rooms[room_id]
-            if game_service.count_active_players == 0:
+            if game_service.count_members == 0:
                 del self._rooms[room_id]
+                self._dirty_rooms.add(room_id)
+                ROOMS_DELETED_EMPTY.inc()
+    
+    def _room_deadline(self, game_service: GameService) -> float:
+        """Momento (monotonic) en que vence la sala según su actividad"""
+        if not game_service.ever_joined:
+            return game_service.created_at + self.unused_room_ttl
+        return game_service.last_activity + self.idle_room_ttl
+    
+    def _schedule_expiry(self, room_id: str, game_service: GameService) -> None:
+        heapq.heappush(
+            self._expiry_heap,
+            (self._room_deadline(game_service), next(self._expiry_seq), room_id, game_service.generation)
+        )
+    
+    def reclaim_expired_rooms(self, now: Optional[float] = None) -> int:
+        """
+        Elimina las salas vencidas (nunca usadas o inactivas).
+        
+        Solo recorre las entradas vencidas del heap, no todas las salas.
+        Las conexiones de una sala inactiva se abortan para que sus handlers
+        ejecuten la desconexión normal.
+        
+        Returns:
+            Cantidad de salas eliminadas
+        """
+        if now is None:
+            now = time.monotonic()
+        reclaimed = 0
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            _, _, room_id, generation = heapq.heappop(self._expiry_heap)
+            game_service = self._rooms.get(room_id)
+            if game_service is None or game_service.generation != generation:
+                # La sala ya fue eliminada (o reemplazada)
+                continue
+            deadline = self._room_deadline(game_service)
+            if deadline > now:
+                self._schedule_expiry(room_id, game_service)
+                continue
+            
+            if game_service.ever_joined:
+                self.rooms_reclaimed_idle += 1
+                ROOMS_DELETED_IDLE.inc()
+            else:
+                self.rooms_reclaimed_unused += 1
+                ROOMS_DELETED_UNUSED.inc()
+            for connection in game_service.room_service.connections:
+                connection.abort()
+            del self._rooms[room_id]
+            self._dirty_rooms.add(room_id)
+            reclaimed += 1
+        return reclaimed
+    
+    def swap_pack(self, name: str, characters: Sequence[str]) -> int:
+        """
+        Reemplaza los personajes de las salas que usan el pack `name` (pack
+        recargado). Las salas toman la lista nueva desde su próxima ronda.
+        
+        Returns:
+            Cantidad de salas actualizadas
+        """
+        is_default = name == self.default_pack
+        if is_default:
+            self.characters = characters
+        updated = 0
+        for game_service in self._rooms.values():
+            if game_service.character_pack == name or (
+                is_default and game_service.character_pack is None and game_service.collection_id is None
+            ):
+                game_service.characters = characters
+                updated += 1
+        return updated
+    
+    def release_unused_packs(self, idle_ttl: float = PACK_IDLE_TTL) -> List[str]:
+        """Descarga los packs de personajes que ninguna sala usa hace `idle_ttl` segundos"""
+        in_use = {
+            game_service.character_pack
+            for game_service in self._rooms.values()
+            if game_service.character_pack is not None
+        }
+        if self.default_pack is not None:
+            in_use.add(self.default_pack)
+        return PACKS.unload_unused(in_use, idle_ttl)
+    
+    def release_unused_collections(self) -> List[int]:
+        """Quita de la cache las colecciones vencidas que ninguna sala usa"""
+        if self.collection_cache is None:
+            return []
+        in_use = {
+            game_service.collection_id
+            for game_service in self._rooms.values()
+            if game_service.collection_id is not None
+        }
+        return self.collection_cache.evict_expired(in_use)
+    
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Contadores del ciclo de vida de las salas"""
+        return {
+            "total_rooms": len(self._rooms),
+            "rooms_reclaimed_unused": self.rooms_reclaimed_unused,
+            "rooms_reclaimed_idle": self.rooms_reclaimed_idle
+        }
+    
+    def collect_metrics(self) -> None:
+        """Actualiza los gauges de salas y jugadores (se llama al exportar métricas)"""
+        counts = [0] * (len(ROOM_PLAYERS_BUCKETS) + 1)
+        active = detached = 0
+        for game_service in self._rooms.values():
+            active += game_service.count_active_players
+            detached += len(game_service.detached_players)
+            counts[bisect_left(ROOM_PLAYERS_BUCKETS, game_service.count_members)] += 1
+        cumulative = 0
+        for gauge, count in zip(ROOMS_BY_PLAYERS_BUCKETS, counts):
+            cumulative += count
+            gauge.set(cumulative)
+        ROOMS.set(len(self._rooms))
+        PLAYERS_ACTIVE.set(active)
+        PLAYERS_DETACHED.set(detached)
     
     @property
     def active_rooms(self) -> Dict[str, GameService]:
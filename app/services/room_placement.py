@@ -0,0 +1,114 @@
+import bisect
+import hashlib
+from typing import Dict, Iterable, List, Optional
+
+from app.config.settings import NODE_ID, NODE_ID_CONFIGURED, CLUSTER_NODES, CLUSTER_VNODES
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def parse_nodes(spec: str) -> Dict[str, str]:
+    """Parsea "node-a=url,node-b=url" a {node_id: url}"""
+    nodes: Dict[str, str] = {}
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        node_id, _, url = item.partition("=")
+        nodes[node_id.strip()] = url.strip()
+    return nodes
+
+
+class HashRing:
+    """
+    Anillo de hash consistente con nodos virtuales.
+    
+    Agregar o quitar un nodo solo mueve las claves de los tramos que ese nodo
+    gana o pierde (~1/N de las salas).
+    """
+
+    def __init__(self, nodes: List[str], vnodes: int = CLUSTER_VNODES):
+        self.vnodes = vnodes
+        self._points: List[int] = []
+        self._owners: List[str] = []
+        self._nodes: set[str] = set()
+        for node_id in nodes:
+            self.add_node(node_id)
+
+    @property
+    def nodes(self) -> List[str]:
+        return sorted(self._nodes)
+
+    def add_node(self, node_id: str) -> None:
+        """Agrega un nodo al anillo"""
+        if node_id in self._nodes:
+            return
+        self._nodes.add(node_id)
+        for i in range(self.vnodes):
+            point = _hash(f"{node_id}#{i}")
+            index = bisect.bisect(self._points, point)
+            self._points.insert(index, point)
+            self._owners.insert(index, node_id)
+
+    def remove_node(self, node_id: str) -> None:
+        """Quita un nodo del anillo"""
+        if node_id not in self._nodes:
+            return
+        self._nodes.discard(node_id)
+        keep = [i for i, owner in enumerate(self._owners) if owner != node_id]
+        self._points = [self._points[i] for i in keep]
+        self._owners = [self._owners[i] for i in keep]
+
+    def node_for(self, key: str) -> str:
+        """Nodo dueño de una clave"""
+        if not self._points:
+            raise LookupError("El anillo no tiene nodos")
+        index = bisect.bisect(self._points, _hash(key)) % len(self._points)
+        return self._owners[index]
+
+
+class RoomPlacement:
+    """Decide qué nodo es dueño de cada sala según el hash de su ID"""
+
+    def __init__(self, node_id: str = NODE_ID, nodes: Optional[Dict[str, str]] = None):
+        if nodes is None:
+            nodes = parse_nodes(CLUSTER_NODES)
+            if nodes and not NODE_ID_CONFIGURED:
+                raise ValueError("CLUSTER_NODES requiere definir NODE_ID con el nombre de este nodo")
+        if not nodes:
+            nodes = {node_id: ""}
+        if node_id not in nodes:
+            raise ValueError(f"NODE_ID {node_id} no está en CLUSTER_NODES")
+        self.node_id = node_id
+        self.nodes = dict(nodes)
+        self.ring = HashRing(list(self.nodes))
+
+    def set_nodes(self, nodes: Dict[str, str]) -> None:
+        """Actualiza la membresía del cluster moviendo la menor cantidad de salas"""
+        for node_id in set(self.nodes) - set(nodes):
+            self.ring.remove_node(node_id)
+        for node_id in nodes:
+            self.ring.add_node(node_id)
+        self.nodes = dict(nodes)
+
+    def owner(self, room_id: str) -> str:
+        """Nodo dueño de la sala"""
+        return self.ring.node_for(room_id)
+
+    def owner_url(self, room_id: str) -> str:
+        """URL base del nodo dueño de la sala"""
+        return self.nodes.get(self.owner(room_id), "")
+
+    def is_local(self, room_id: str) -> bool:
+        """Verifica si la sala pertenece a este nodo"""
+        return len(self.nodes) == 1 or self.owner(room_id) == self.node_id
+
+    def group_by_owner(self, room_ids: Iterable[str]) -> Dict[str, List[str]]:
+        """Agrupa IDs de sala por nodo dueño (conservando el orden)"""
+        groups: Dict[str, List[str]] = {}
+        for room_id in room_ids:
+            owner = self.node_id if len(self.nodes) == 1 else self.owner(room_id)
+            groups.setdefault(owner, []).append(room_id)
+        return groups
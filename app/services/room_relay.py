@@ -0,0 +1,240 @@
+import asyncio
+import itertools
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from fastapi import WebSocketDisconnect
+
+from app.config.settings import RELAY_JOIN_TIMEOUT
+from app.services.admission_service import ROOM_NOT_FOUND
+from app.services.backplane import Backplane
+from app.services.connection import Connection
+from app.utils.codecs import Codec, Frame
+
+logger = logging.getLogger(__name__)
+
+
+class RelayCodec(Codec):
+    """
+    Codec de los miembros remotos: el mensaje viaja por el backplane sin
+    serializar y lo serializa el proceso que tiene el WebSocket, con el codec
+    que negoció el cliente.
+    """
+
+    name = "relay"
+
+    def encode(self, message: Dict[str, Any]) -> Frame:
+        return message
+
+    def decode(self, frame: Frame) -> Any:
+        return frame
+
+
+RELAY_CODEC = RelayCodec()
+
+
+class RemoteConnection(Connection):
+    """
+    Conexión de un jugador cuyo WebSocket está en otro proceso (el borde).
+
+    Para la sala es una conexión más: los frames se encolan igual y la tarea
+    escritora los envía por el backplane al borde. Los mensajes del cliente
+    llegan del borde y se leen con receive(); si el borde avisa que el
+    cliente se desconectó, receive() lanza WebSocketDisconnect.
+    """
+
+    def __init__(self, relay: "RoomRelay", edge: str, conn_id: str, name: str = ""):
+        super().__init__(None, RELAY_CODEC, name=name)
+        self.relay = relay
+        self.edge = edge
+        self.conn_id = conn_id
+        # Mensajes del cliente (None = desconectado)
+        self._inbox: asyncio.Queue = asyncio.Queue()
+
+    async def send_frame(self, frame: Frame) -> None:
+        await self.relay.backplane.send(self.edge, {"kind": "frame", "conn": self.conn_id, "message": frame})
+
+    def push(self, data: Optional[Any]) -> None:
+        """Entrega un mensaje del cliente recibido del borde (None = desconectado)"""
+        if data is not None:
+            if self._inbox.qsize() >= self.max_queue:
+                # El dueño aplica los límites de mensajes; un exceso así se descarta
+                return
+            self.last_seen = time.monotonic()
+        self._inbox.put_nowait(data)
+
+    async def receive(self) -> Any:
+        data = await self._inbox.get()
+        if data is None:
+            raise WebSocketDisconnect(code=1000)
+        return data
+
+    async def close(self, code: int = 1000) -> None:
+        """Detiene la escritura y le pide al borde que cierre el WebSocket"""
+        self.stop()
+        self.relay.forget(self.conn_id)
+        await self.relay.backplane.send(self.edge, {"kind": "close", "conn": self.conn_id, "code": code})
+
+
+# Admite en una sala local a un jugador conectado en otro proceso.
+# (room_id, player_name, resume_token, conexión remota) -> motivo de rechazo o None
+JoinHandler = Callable[[str, str, Optional[str], RemoteConnection], Awaitable[Optional[str]]]
+
+
+class RoomRelay:
+    """
+    Membresía de salas entre procesos sobre el backplane.
+
+    Un jugador puede conectarse por WebSocket a cualquier proceso. Si la sala
+    no está en ese proceso (el borde), el borde publica un pedido de unión y
+    el proceso dueño de la sala lo admite con una RemoteConnection: desde ahí
+    es un miembro más de la sala (rol, admin, broadcasts, rondas). El borde
+    solo reenvía los mensajes del cliente al dueño y los frames del dueño al
+    WebSocket. Cada sala sigue viviendo en un único event loop.
+    """
+
+    def __init__(
+        self,
+        backplane: Backplane,
+        has_room: Callable[[str], bool],
+        join_timeout: float = RELAY_JOIN_TIMEOUT
+    ):
+        self.backplane = backplane
+        self.has_room = has_room
+        self.join_timeout = join_timeout
+        # Lo registra WebSocketRoutes para admitir jugadores en salas locales
+        self.on_join: Optional[JoinHandler] = None
+        # Dueño: miembros remotos de salas locales (conn_id -> conexión)
+        self._members: Dict[str, RemoteConnection] = {}
+        # Borde: WebSockets reenviados (conn_id -> conexión), su dueño y el
+        # código con el que el dueño pidió cerrarlos
+        self._bridges: Dict[str, Connection] = {}
+        self._owners: Dict[str, str] = {}
+        self._close_codes: Dict[str, int] = {}
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._ids = itertools.count()
+
+    @property
+    def enabled(self) -> bool:
+        """Hay otros procesos que pueden ser dueños de la sala"""
+        return self.backplane.has_peers()
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {"relay_members": len(self._members), "relay_bridges": len(self._bridges)}
+
+    # ============= Borde =============
+
+    async def join(
+        self,
+        room_id: str,
+        player_name: str,
+        resume_token: Optional[str],
+        connection: Connection
+    ) -> Tuple[str, Optional[str]]:
+        """
+        Pide unirse a una sala de otro proceso.
+
+        Returns:
+            Tupla (conn_id, motivo de rechazo o None si fue admitido). Si
+            ningún proceso responde a tiempo, la sala no existe
+        """
+        conn_id = f"{self.backplane.node_id}:{next(self._ids)}"
+        future = asyncio.get_running_loop().create_future()
+        self._pending[conn_id] = future
+        # Registrar antes de publicar: el dueño puede enviar frames enseguida
+        self._bridges[conn_id] = connection
+        timed_out = False
+        try:
+            await self.backplane.publish({
+                "kind": "join",
+                "conn": conn_id,
+                "room_id": room_id,
+                "player_name": player_name,
+                "resume_token": resume_token
+            })
+            reason = await asyncio.wait_for(future, self.join_timeout)
+        except asyncio.TimeoutError:
+            reason = ROOM_NOT_FOUND
+            timed_out = True
+        finally:
+            del self._pending[conn_id]
+
+        if reason is not None:
+            self._bridges.pop(conn_id, None)
+            self._owners.pop(conn_id, None)
+            if timed_out:
+                # Por si el dueño lo admitió tarde
+                await self.backplane.publish({"kind": "disconnect", "conn": conn_id})
+        return conn_id, reason
+
+    async def forward(self, conn_id: str, data: Any) -> None:
+        """Reenvía al dueño un mensaje del cliente"""
+        owner = self._owners.get(conn_id)
+        if owner is not None:
+            await self.backplane.send(owner, {"kind": "message", "conn": conn_id, "data": data})
+
+    async def leave(self, conn_id: str) -> Optional[int]:
+        """
+        Da de baja un WebSocket reenviado y avisa al dueño, salvo que el cierre
+        lo haya pedido él. Retorna el código de cierre pedido por el dueño.
+        """
+        self._bridges.pop(conn_id, None)
+        owner = self._owners.pop(conn_id, None)
+        code = self._close_codes.pop(conn_id, None)
+        if code is None and owner is not None:
+            await self.backplane.send(owner, {"kind": "disconnect", "conn": conn_id})
+        return code
+
+    # ============= Dueño =============
+
+    def forget(self, conn_id: str) -> None:
+        """Quita un miembro remoto (su conexión se cerró)"""
+        self._members.pop(conn_id, None)
+
+    async def _on_join(self, message: Dict[str, Any]) -> None:
+        if self.on_join is None or not self.has_room(message["room_id"]):
+            return
+        conn_id, edge = message["conn"], message["origin"]
+        connection = RemoteConnection(self, edge, conn_id, name=message["player_name"])
+        self._members[conn_id] = connection
+        try:
+            reason = await self.on_join(
+                message["room_id"], message["player_name"], message.get("resume_token"), connection
+            )
+        except Exception as e:
+            logger.error(f"Error admitiendo un jugador remoto: {e}")
+            reason = ROOM_NOT_FOUND
+        if reason is not None:
+            self.forget(conn_id)
+        await self.backplane.send(edge, {"kind": "join_reply", "conn": conn_id, "reason": reason})
+
+    # ============= Mensajes del backplane =============
+
+    async def handle(self, message: Dict[str, Any]) -> None:
+        """Handler del backplane"""
+        kind = message.get("kind")
+        conn_id = message.get("conn")
+        if kind == "frame":
+            bridge = self._bridges.get(conn_id)
+            if bridge is not None:
+                frame = message["message"]
+                bridge.enqueue(bridge.encode(frame), frame["code_ws"])
+        elif kind == "message" or kind == "disconnect":
+            member = self._members.get(conn_id)
+            if member is not None:
+                member.push(message.get("data") if kind == "message" else None)
+        elif kind == "join":
+            await self._on_join(message)
+        elif kind == "join_reply":
+            future = self._pending.get(conn_id)
+            if future is not None and not future.done():
+                if message["reason"] is None:
+                    self._owners[conn_id] = message["origin"]
+                future.set_result(message["reason"])
+        elif kind == "close":
+            bridge = self._bridges.get(conn_id)
+            if bridge is not None:
+                self._close_codes[conn_id] = message.get("code", 1000)
+                bridge.abort()
@@ -1,71 +1,194 @@
+import random
+import time
 from typing import List, Dict, Any, Optional
 
 from fastapi import WebSocket
 
 from app.models.player import Player
+from app.services.connection import Connection
+from app.utils.codecs import Frame
+from app.utils.metrics import REGISTRY
+
+BROADCAST_SECONDS = REGISTRY.histogram(
+    "impostor_broadcast_duration_seconds",
+    "Tiempo de serializar y encolar un broadcast para las conexiones de la sala"
+)
+SEND_MANY_SECONDS = REGISTRY.histogram(
+    "impostor_send_many_duration_seconds",
+    "Tiempo de serializar y encolar mensajes individuales (por ejemplo, inicio de ronda)"
+)
+FRAMES_ENQUEUED = REGISTRY.counter("impostor_frames_enqueued_total", "Frames encolados para envío")
 
 
 class RoomService:
-    """Servicio para gestionar la sala de juego y conexiones"""
+    """
+    Servicio para gestionar la sala de juego y conexiones.
+    
+    Los jugadores conectados a otro proceso son miembros como cualquier otro,
+    con una RemoteConnection que reenvía sus frames por el backplane.
+    """
     
-    def __init__(self):
-        self._active_players: Dict[str, tuple[Player, WebSocket]] = {}
+    def __init__(self, room_id: Optional[str] = None):
+        # Membresía indexada: listas paralelas de jugadores y conexiones más un
+        # índice nombre -> posición. Las bajas intercambian con el último
+        # elemento, así altas, bajas, búsquedas y elección al azar son O(1)
+        self._players: List[Player] = []
+        self._connections: List[Connection] = []
+        self._index: Dict[str, int] = {}
+        # Cantidad de admins entre los jugadores activos
+        self._admin_count = 0
+        # Lista de info_in_room de los jugadores activos; se reconstruye solo
+        # cuando cambia la membresía o el admin
+        self._players_info: Optional[List[Dict[str, Any]]] = None
+        self.room_id = room_id
     
     @property
     def active_players(self) -> List[Player]:
-        """Retorna lista de jugadores activos"""
-        return [player for player, _ in self._active_players.values()]
+        """Retorna lista de jugadores activos (vista interna: no modificar)"""
+        return self._players
     
     @property
     def count_active_players(self) -> int:
         """Retorna cantidad de jugadores activos"""
-        return len(self._active_players)
+        return len(self._players)
+    
+    @property
+    def players_info(self) -> List[Dict[str, Any]]:
+        """Retorna info_in_room de los jugadores activos (lista compartida: no modificar)"""
+        if self._players_info is None:
+            self._players_info = [player.info_in_room for player in self._players]
+        return self._players_info
+    
+    def get_player(self, name: str) -> Optional[Player]:
+        """Obtiene un jugador activo por nombre"""
+        index = self._index.get(name)
+        return self._players[index] if index is not None else None
+    
+    def get_player_connection(self, player: Player) -> Optional[Connection]:
+        """Obtiene la conexión de un jugador"""
+        index = self._index.get(player.name)
+        return self._connections[index] if index is not None else None
+    
+    @property
+    def connections(self) -> List[Connection]:
+        """Retorna las conexiones de los jugadores activos (vista interna: no modificar)"""
+        return self._connections
     
     def get_player_websocket(self, player: Player) -> Optional[WebSocket]:
         """Obtiene el WebSocket de un jugador"""
-        if player.name in self._active_players:
-            _, websocket = self._active_players[player.name]
-            return websocket
-        return None
+        connection = self.get_player_connection(player)
+        return connection.websocket if connection else None
+    
+    def random_player(self) -> Optional[Player]:
+        """Elige un jugador activo al azar (uniforme)"""
+        if not self._players:
+            return None
+        return self._players[random.randrange(len(self._players))]
     
-    def connect(self, player: Player, websocket: WebSocket) -> bool:
+    def connect(self, player: Player, connection: Connection) -> bool:
         """Conecta un nuevo jugador a la sala"""
-        if player.name in self._active_players:
+        if player.name in self._index:
             return False
-        self._active_players[player.name] = (player, websocket)
+        self._index[player.name] = len(self._players)
+        self._players.append(player)
+        self._connections.append(connection)
+        if player.is_admin:
+            self._admin_count += 1
+        self._players_info = None
         return True
     
-    def disconnect(self, player: Player) -> None:
-        """Desconecta un jugador de la sala"""
-        if player.name in self._active_players:
-            del self._active_players[player.name]
+    def disconnect(self, player: Player, connection: Optional[Connection] = None) -> bool:
+        """
+        Desconecta un jugador de la sala.
+        
+        Solo se elimina si es el mismo jugador (el nombre pudo reutilizarse) y,
+        si se indica `connection`, si sigue conectado por esa conexión.
+        """
+        index = self._index.get(player.name)
+        if index is None or self._players[index] is not player:
+            return False
+        if connection is not None and self._connections[index] is not connection:
+            return False
+        
+        last_player = self._players.pop()
+        last_connection = self._connections.pop()
+        if last_player is not player:
+            self._players[index] = last_player
+            self._connections[index] = last_connection
+            self._index[last_player.name] = index
+        del self._index[player.name]
+        if player.is_admin:
+            self._admin_count -= 1
+        self._players_info = None
+        return True
+    
+    def replace_connection(self, player: Player, connection: Connection) -> Optional[Connection]:
+        """Reemplaza la conexión de un jugador activo. Retorna la conexión anterior"""
+        index = self._index.get(player.name)
+        if index is None or self._players[index] is not player:
+            return None
+        previous = self._connections[index]
+        self._connections[index] = connection
+        return previous
+    
+    def set_admin(self, player: Player, value: bool = True) -> None:
+        """Cambia el admin de un jugador manteniendo el conteo de admins de la sala"""
+        if player.is_admin == value:
+            return
+        player.is_admin = value
+        index = self._index.get(player.name)
+        if index is not None and self._players[index] is player:
+            self._admin_count += 1 if value else -1
+            self._players_info = None
     
     async def broadcast(self, data: Dict[str, Any], code_ws: int) -> None:
-        """Envía un mensaje a todos los jugadores conectados"""
+        """
+        Envía un mensaje a todos los jugadores conectados.
+        
+        El mensaje se serializa una sola vez por codec y el mismo frame se
+        encola en la cola de salida de cada destinatario que comparte ese codec.
+        """
         data_ws = {
             "code_ws": code_ws,
             "data": data
         }
         
-        for player, websocket in self._active_players.values():
-            try:
-                await websocket.send_json(data_ws)
-            except Exception as e:
-                print(f"Error broadcasting to {player.name}: {e}")
+        started = time.perf_counter()
+        frames: Dict[str, Frame] = {}
+        for connection in self._connections:
+            codec = connection.codec
+            frame = frames.get(codec.name)
+            if frame is None:
+                frame = frames[codec.name] = codec.encode(data_ws)
+            connection.enqueue(frame, code_ws)
+        FRAMES_ENQUEUED.inc(len(self._connections))
+        BROADCAST_SECONDS.observe(time.perf_counter() - started)
+    
+    async def send_many(self, messages: List[tuple[Player, Dict[str, Any]]], code_ws: int) -> None:
+        """Envía un mensaje distinto a cada jugador"""
+        started = time.perf_counter()
+        for player, data in messages:
+            self.deliver_to_player(player.name, data, code_ws)
+        SEND_MANY_SECONDS.observe(time.perf_counter() - started)
+    
+    def deliver_to_player(self, name: str, data: Dict[str, Any], code_ws: int) -> bool:
+        """Encola un mensaje para un jugador activo. Retorna False si no está en la sala"""
+        index = self._index.get(name)
+        if index is None:
+            return False
+        connection = self._connections[index]
+        data_ws = {
+            "code_ws": code_ws,
+            "data": data
+        }
+        connection.enqueue(connection.encode(data_ws), code_ws)
+        FRAMES_ENQUEUED.inc()
+        return True
     
     async def send_to_player(self, player: Player, data: Dict[str, Any], code_ws: int) -> None:
         """Envía un mensaje a un jugador específico"""
-        websocket = self.get_player_websocket(player)
-        if websocket:
-            data_ws = {
-                "code_ws": code_ws,
-                "data": data
-            }
-            try:
-                await websocket.send_json(data_ws)
-            except Exception as e:
-                print(f"Error sending to {player.name}: {e}")
+        await self.send_many([(player, data)], code_ws)
     
     def has_admin(self) -> bool:
         """Verifica si hay algún admin en la sala"""
-        return any(player.is_admin for player in self.active_players)
+        return self._admin_count > 0
@@ -0,0 +1,48 @@
+import asyncio
+import logging
+from typing import Optional
+
+from app.config.settings import ROOM_SWEEP_INTERVAL
+from app.services.room_manager import RoomManager
+
+logger = logging.getLogger(__name__)
+
+
+class RoomSweeperService:
+    """Barre periódicamente las salas vencidas, los packs sin uso y las colecciones vencidas del RoomManager"""
+
+    def __init__(self, room_manager: RoomManager, interval: float = ROOM_SWEEP_INTERVAL):
+        self.room_manager = room_manager
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Inicia el barrido en segundo plano"""
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Detiene el barrido"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                reclaimed = self.room_manager.reclaim_expired_rooms()
+                if reclaimed:
+                    logger.info(f"Salas vencidas eliminadas: {reclaimed}")
+                unloaded = self.room_manager.release_unused_packs()
+                if unloaded:
+                    logger.info(f"Packs de personajes descargados: {', '.join(unloaded)}")
+                evicted = self.room_manager.release_unused_collections()
+                if evicted:
+                    logger.info(f"Colecciones quitadas de la cache: {', '.join(map(str, evicted))}")
+            except Exception as e:
+                logger.error(f"Error barriendo salas: {e}")
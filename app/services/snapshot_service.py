@@ -0,0 +1,80 @@
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+
+from app.config.settings import SNAPSHOT_INTERVAL, SNAPSHOT_LOG_MAX
+from app.services.room_manager import RoomManager
+from app.utils.storage import SnapshotStore
+
+logger = logging.getLogger(__name__)
+
+
+class SnapshotService:
+    """
+    Persiste periódicamente las salas modificadas en un SnapshotStore.
+    
+    En cada ciclo solo se serializan las salas que cambiaron y se agregan al
+    log; la escritura a disco corre en un thread, fuera del event loop. Se
+    mantiene en memoria el último estado persistido para compactar el log sin
+    volver a serializar todas las salas.
+    """
+
+    def __init__(
+        self,
+        room_manager: RoomManager,
+        store: SnapshotStore,
+        interval: float = SNAPSHOT_INTERVAL,
+        log_max: int = SNAPSHOT_LOG_MAX
+    ):
+        self.room_manager = room_manager
+        self.store = store
+        self.interval = interval
+        self.log_max = log_max
+        self._persisted: Dict[str, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def restore(self) -> int:
+        """Carga las salas guardadas en el RoomManager. Retorna cuántas restauró"""
+        self._persisted = await asyncio.to_thread(self.store.load)
+        self.room_manager.restore_rooms(self._persisted)
+        return len(self._persisted)
+
+    def start(self) -> None:
+        """Inicia los snapshots periódicos"""
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Detiene los snapshots y persiste los últimos cambios"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.save()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.save()
+            except Exception as e:
+                logger.error(f"Error guardando snapshot de salas: {e}")
+
+    async def save(self) -> None:
+        """Agrega al log los cambios pendientes y compacta si el log creció demasiado"""
+        dirty = self.room_manager.pop_dirty_rooms()
+        if not dirty:
+            return
+        for room_id, state in dirty.items():
+            if state is None:
+                self._persisted.pop(room_id, None)
+            else:
+                self._persisted[room_id] = state
+        await asyncio.to_thread(self.store.append, list(dirty.items()))
+        
+        # Compactar cuando el log supera al snapshot: el costo queda amortizado
+        if self.store.log_entries > max(self.log_max, len(self._persisted)):
+            await asyncio.to_thread(self.store.compact, dict(self._persisted))
@@ -0,0 +1,103 @@
+import json
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependencia opcional
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - dependencia opcional
+    msgpack = None
+
+from app.config.settings import WS_JSON_CODEC
+
+Frame = Union[str, bytes]
+
+
+class Codec(ABC):
+    """Interfaz de serialización de frames WebSocket"""
+
+    name: str = ""
+    # True si los frames viajan como binarios (send_bytes), False si como texto
+    binary: bool = False
+
+    @abstractmethod
+    def encode(self, message: Dict[str, Any]) -> Frame:
+        """Serializa un mensaje a un frame listo para enviar"""
+        pass
+
+    @abstractmethod
+    def decode(self, frame: Frame) -> Any:
+        """Deserializa un frame recibido"""
+        pass
+
+
+class JsonCodec(Codec):
+    """JSON con la librería estándar (mismo formato que send_json)"""
+
+    name = "json"
+
+    def encode(self, message: Dict[str, Any]) -> Frame:
+        return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+    def decode(self, frame: Frame) -> Any:
+        return json.loads(frame)
+
+
+class OrjsonCodec(Codec):
+    """JSON con orjson (requiere el paquete opcional orjson)"""
+
+    name = "orjson"
+
+    def encode(self, message: Dict[str, Any]) -> Frame:
+        return orjson.dumps(message).decode("utf-8")
+
+    def decode(self, frame: Frame) -> Any:
+        return orjson.loads(frame)
+
+
+class MsgpackCodec(Codec):
+    """MessagePack binario (requiere el paquete opcional msgpack)"""
+
+    name = "msgpack"
+    binary = True
+
+    def encode(self, message: Dict[str, Any]) -> Frame:
+        return msgpack.packb(message, use_bin_type=True)
+
+    def decode(self, frame: Frame) -> Any:
+        return msgpack.unpackb(frame, raw=False)
+
+
+def _default_json_codec() -> Codec:
+    """Elige el codec JSON según WS_JSON_CODEC (auto usa orjson si está instalado)"""
+    if WS_JSON_CODEC == "orjson" or (WS_JSON_CODEC == "auto" and orjson is not None):
+        if orjson is None:
+            raise RuntimeError("WS_JSON_CODEC=orjson pero orjson no está instalado")
+        return OrjsonCodec()
+    return JsonCodec()
+
+
+DEFAULT_CODEC: Codec = _default_json_codec()
+
+# Subprotocolos WebSocket que el cliente puede negociar -> codec
+SUBPROTOCOL_CODECS: Dict[str, Codec] = {"impostor.json": DEFAULT_CODEC}
+if msgpack is not None:
+    SUBPROTOCOL_CODECS["impostor.msgpack"] = MsgpackCodec()
+
+
+def negotiate_codec(requested: List[str]) -> Tuple[Codec, Optional[str]]:
+    """
+    Elige el codec para una conexión a partir de los subprotocolos pedidos.
+
+    Returns:
+        Tupla (codec, subprotocolo aceptado o None si se usa el default)
+    """
+    for subprotocol in requested:
+        codec = SUBPROTOCOL_CODECS.get(subprotocol)
+        if codec is not None:
+            return codec, subprotocol
+    return DEFAULT_CODEC, None
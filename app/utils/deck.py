@@ -0,0 +1,67 @@
+import random
+from typing import Optional
+
+_ROUNDS = 4
+_MUL = 0x9E3779B1
+
+
+class ShuffledDeck:
+    """
+    Mazo barajado perezosamente sobre los índices 0..size-1.
+
+    No guarda una copia de la lista ni los índices: la baraja es una
+    permutación pseudoaleatoria (red de Feistel con clave al azar, acotada a
+    `size` por cycle-walking) y el estado es solo la clave y la posición. Cada
+    robo es O(1) esperado, no se repite ningún índice hasta agotar el mazo y
+    la memoria es constante sin importar `size`.
+    """
+
+    __slots__ = ("size", "position", "last", "_half_bits", "_half_mask", "_keys")
+
+    def __init__(self, size: int):
+        self.last: Optional[int] = None
+        self._reset(size)
+
+    def _reset(self, size: int) -> None:
+        self.size = size
+        self.position = 0
+        # Dominio de la red: 2 mitades de igual cantidad de bits que cubren size
+        bits = max(2, (size - 1).bit_length())
+        self._half_bits = (bits + 1) // 2
+        self._half_mask = (1 << self._half_bits) - 1
+        self._keys = tuple(random.getrandbits(32) for _ in range(_ROUNDS))
+
+    def _feistel(self, value: int) -> int:
+        half_bits, mask = self._half_bits, self._half_mask
+        left, right = value >> half_bits, value & mask
+        for key in self._keys:
+            left, right = right, left ^ ((((right ^ key) * _MUL) >> 7) & mask)
+        return (left << half_bits) | right
+
+    def _permute(self, value: int) -> int:
+        # Cycle-walking: reaplicar la permutación hasta caer dentro de size
+        value = self._feistel(value)
+        while value >= self.size:
+            value = self._feistel(value)
+        return value
+
+    def draw(self, size: Optional[int] = None) -> int:
+        """
+        Roba el próximo índice. Al agotarse, se baraja de nuevo evitando
+        repetir el último índice robado.
+
+        Si `size` cambia (la lista subyacente cambió) se empieza un mazo nuevo.
+        """
+        if size is not None and size != self.size:
+            self._reset(size)
+        if self.size <= 0:
+            raise IndexError("Mazo vacío")
+        if self.position >= self.size:
+            self._reset(self.size)
+            if self.size > 1:
+                while self._permute(0) == self.last:
+                    self._reset(self.size)
+        index = self._permute(self.position)
+        self.position += 1
+        self.last = index
+        return index
@@ -0,0 +1,217 @@
+"""
+Registro de métricas en proceso (contadores, gauges e histogramas) con salida
+en formato de texto de Prometheus.
+
+Registrar una muestra es una suma de enteros (o una búsqueda binaria en los
+buckets de un histograma) sin locks: todo corre en el hilo del event loop.
+Las métricas con etiquetas resuelven el hijo una vez con `labels(...)` y lo
+reutilizan en el camino caliente.
+"""
+
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+Number = Union[int, float]
+
+# Buckets por defecto para duraciones (segundos)
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: Number) -> str:
+    if isinstance(value, float):
+        if value == float("inf"):
+            return "+Inf"
+        return repr(value)
+    return str(value)
+
+
+class _Metric(ABC):
+    """Base de las métricas: nombre, ayuda, etiquetas e hijos por etiqueta"""
+
+    type = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        callback: Optional[Callable[[], Union[Number, Dict[Tuple[str, ...], Number]]]] = None
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+        self._children: Dict[Tuple[str, ...], "_Metric"] = {}
+
+    def labels(self, *values: str) -> "_Metric":
+        """Retorna (creándolo si hace falta) el hijo para esos valores de etiqueta"""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} espera las etiquetas {self.labelnames}")
+            child = self._children[values] = self._new_child()
+        return child
+
+    @abstractmethod
+    def _new_child(self) -> "_Metric":
+        """Crea el hijo de una combinación de etiquetas"""
+
+    @abstractmethod
+    def _own_lines(self, name: str, labels: str) -> Iterable[str]:
+        """Líneas de exportación del valor propio de la métrica"""
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.type}"
+        if self.callback is not None:
+            result = self.callback()
+            if isinstance(result, dict):
+                for values, value in result.items():
+                    yield f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(value)}"
+            else:
+                yield f"{self.name} {_format_value(result)}"
+        elif self.labelnames:
+            for values, child in self._children.items():
+                yield from child._own_lines(self.name, _format_labels(self.labelnames, values))
+        else:
+            yield from self._own_lines(self.name, "")
+
+
+class Counter(_Metric):
+    """Contador monótono"""
+
+    type = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.value: Number = 0
+
+    def inc(self, amount: Number = 1) -> None:
+        self.value += amount
+
+    def _new_child(self) -> "Counter":
+        return Counter(self.name, self.documentation)
+
+    def _own_lines(self, name: str, labels: str) -> Iterable[str]:
+        yield f"{name}{labels} {_format_value(self.value)}"
+
+
+class Gauge(_Metric):
+    """Valor que sube y baja (o que se calcula con `callback` al exportar)"""
+
+    type = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.value: Number = 0
+
+    def set(self, value: Number) -> None:
+        self.value = value
+
+    def inc(self, amount: Number = 1) -> None:
+        self.value += amount
+
+    def dec(self, amount: Number = 1) -> None:
+        self.value -= amount
+
+    def _new_child(self) -> "Gauge":
+        return Gauge(self.name, self.documentation)
+
+    def _own_lines(self, name: str, labels: str) -> Iterable[str]:
+        yield f"{name}{labels} {_format_value(self.value)}"
+
+
+class Histogram(_Metric):
+    """Histograma con buckets fijos"""
+
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Un contador por bucket más el de +Inf (no acumulados)
+        self.counts: List[int] = [0] * (len(self.buckets) + 1)
+        self.sum: float = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def _new_child(self) -> "Histogram":
+        return Histogram(self.name, self.documentation, buckets=self.buckets)
+
+    def _own_lines(self, name: str, labels: str) -> Iterable[str]:
+        inner = labels[1:-1] if labels else ""
+        prefix = inner + "," if inner else ""
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{prefix}le="{_format_value(float(bound))}"}} {cumulative}'
+        yield f"{name}_sum{labels} {_format_value(self.sum)}"
+        yield f"{name}_count{labels} {self.count}"
+
+
+class MetricsRegistry:
+    """Registro de métricas y exportación en formato de texto de Prometheus"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+
+    def _register(self, metric: _Metric) -> _Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                raise ValueError(
+                    f"La métrica {metric.name} ya está registrada como {existing.type} "
+                    f"con etiquetas {existing.labelnames}"
+                )
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = (), callback=None) -> Counter:
+        return self._register(Counter(name, documentation, labelnames, callback))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = (), callback=None) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames, callback))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        """Registra una función que actualiza métricas justo antes de exportarlas"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Exporta todas las métricas en formato de texto de Prometheus"""
+        for collector in self._collectors:
+            collector()
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Registro global de la aplicación
+REGISTRY = MetricsRegistry()
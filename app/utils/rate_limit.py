@@ -0,0 +1,41 @@
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    Token bucket con recarga perezosa: `rate` tokens por segundo hasta un
+    máximo de `burst`. rate <= 0 desactiva el límite.
+    """
+
+    __slots__ = ("rate", "burst", "tokens", "updated_at", "rejected_streak")
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self.tokens = self.burst
+        self.updated_at = time.monotonic()
+        # Rechazos consecutivos desde el último consumo exitoso
+        self.rejected_streak = 0
+
+    def try_acquire(self, cost: float = 1.0, now: Optional[float] = None) -> bool:
+        """Consume `cost` tokens si hay disponibles. Retorna False si se excede el límite"""
+        if self.rate <= 0:
+            return True
+        if now is None:
+            now = time.monotonic()
+        tokens = self.tokens + (now - self.updated_at) * self.rate
+        self.tokens = tokens if tokens < self.burst else self.burst
+        self.updated_at = now
+        if self.tokens < cost:
+            self.rejected_streak += 1
+            return False
+        self.tokens -= cost
+        self.rejected_streak = 0
+        return True
+
+    def retry_after(self, cost: float = 1.0) -> float:
+        """Segundos hasta que haya `cost` tokens disponibles"""
+        if self.rate <= 0 or self.tokens >= cost:
+            return 0.0
+        return (cost - self.tokens) / self.rate
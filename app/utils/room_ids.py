@@ -0,0 +1,88 @@
+import re
+import secrets
+from typing import Callable, Optional
+
+# Alfabeto base32 en minúsculas sin caracteres ambiguos (i, l, o, u): apto
+# para URLs y fácil de dictar
+ALPHABET = "0123456789abcdefghjkmnpqrstvwxyz"
+
+# Cada ID codifica 40 bits en 8 caracteres (5 bits por carácter)
+ID_BITS = 40
+ID_LENGTH = ID_BITS // 5
+_MASK = (1 << ID_BITS) - 1
+_HALF = ID_BITS // 2
+
+# Multiplicadores impares (invertibles módulo 2**40)
+_MUL_1 = 0xBF58476D1D & _MASK | 1
+_MUL_2 = 0x94D049BB13 & _MASK | 1
+
+# Tabla de pares de caracteres: 10 bits -> 2 caracteres
+_PAIRS = [a + b for a in ALPHABET for b in ALPHABET]
+_ALPHABET_SET = frozenset(ALPHABET)
+
+_PREFIX_RE = re.compile(r"^[A-Za-z0-9_-]*$")
+
+
+class RoomIdAllocator:
+    """
+    Generador de IDs de sala cortos, aptos para URL y sin colisiones.
+
+    Cada ID sale de un contador de 40 bits pasado por una permutación
+    (multiplicación impar + xor-shift, biyectiva sobre 2**40) con una clave
+    aleatoria por proceso: los IDs no son secuenciales ni adivinables, y el
+    mismo proceso no repite uno hasta agotar los 2**40 valores. El prefijo
+    opcional (nodo/worker) separa los espacios de IDs entre procesos.
+    """
+
+    def __init__(self, prefix: str = "", key: Optional[int] = None, start: Optional[int] = None):
+        if not _PREFIX_RE.match(prefix):
+            raise ValueError(f"Prefijo de ID de sala inválido: {prefix!r}")
+        self.prefix = prefix
+        self._key = secrets.randbits(ID_BITS) if key is None else key & _MASK
+        self._counter = secrets.randbits(ID_BITS) if start is None else start & _MASK
+        self.allocated = 0
+
+    @staticmethod
+    def _permute(value: int) -> int:
+        value = (value * _MUL_1) & _MASK
+        value ^= value >> _HALF
+        value = (value * _MUL_2) & _MASK
+        value ^= value >> _HALF
+        return value
+
+    @staticmethod
+    def _encode(value: int) -> str:
+        pairs = _PAIRS
+        return (
+            pairs[value >> 30]
+            + pairs[(value >> 20) & 0x3FF]
+            + pairs[(value >> 10) & 0x3FF]
+            + pairs[value & 0x3FF]
+        )
+
+    def next_id(self) -> str:
+        """Genera el próximo ID (único dentro de este generador)"""
+        value = self._counter
+        self._counter = (value + 1) & _MASK
+        self.allocated += 1
+        return self.prefix + self._encode(self._permute(value) ^ self._key)
+
+    def is_valid(self, room_id: str) -> bool:
+        """Verifica que el ID tenga el formato de este generador (prefijo + 8 caracteres del alfabeto)"""
+        return (
+            len(room_id) == len(self.prefix) + ID_LENGTH
+            and room_id.startswith(self.prefix)
+            and _ALPHABET_SET.issuperset(room_id[len(self.prefix):])
+        )
+
+    def allocate(self, is_taken: Callable[[str], bool]) -> str:
+        """
+        Genera un ID que no esté en uso.
+
+        `is_taken` cubre las salas que no salieron de este generador (por
+        ejemplo, restauradas de un snapshot de un proceso anterior).
+        """
+        room_id = self.next_id()
+        while is_taken(room_id):
+            room_id = self.next_id()
+        return room_id
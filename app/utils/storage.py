@@ -1,14 +1,105 @@
 import json
+import os
 from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
 
 STATE_FILE = Path("db.json")
 
+
+def _fsync_dir(directory: Path) -> None:
+    """Persiste las entradas de un directorio (el rename o la creación de un archivo)"""
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    """Escribe un archivo completo de forma atómica (temporal + fsync + rename + fsync del directorio)"""
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    _fsync_dir(path.parent)
+
+
 def load_state():
     if not STATE_FILE.exists():
         return {"count": 0, "impostor_assigned": False, "character": None, "first_assigned": False}
     with open(STATE_FILE, "r", encoding="utf-8") as f:
         return json.load(f)
 
+
 def save_state(state):
-    with open(STATE_FILE, "w", encoding="utf-8") as f:
-        json.dump(state, f, indent=2, ensure_ascii=False)
+    _write_atomic(STATE_FILE, json.dumps(state, indent=2, ensure_ascii=False))
+
+
+class SnapshotStore:
+    """
+    Persistencia de salas a prueba de caídas.
+    
+    Usa un snapshot completo (`rooms.snapshot.json`, escrito con temporal +
+    rename) más un log de cambios de solo-agregar (`rooms.log`, una línea JSON
+    por sala modificada; `state` null indica sala eliminada). Al cargar se
+    aplica el log sobre el snapshot; una última línea truncada por una caída
+    se ignora. Todos los métodos son bloqueantes: llamarlos fuera del event loop.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self.snapshot_path = self.directory / "rooms.snapshot.json"
+        self.log_path = self.directory / "rooms.log"
+        self.log_entries = 0
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """Carga el estado de todas las salas (snapshot + log)"""
+        rooms: Dict[str, Dict[str, Any]] = {}
+        if self.snapshot_path.exists():
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                rooms = json.load(f).get("rooms", {})
+        self.log_entries = 0
+        if self.log_path.exists():
+            with open(self.log_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Escritura interrumpida al final del log
+                        break
+                    self.log_entries += 1
+                    if entry["state"] is None:
+                        rooms.pop(entry["room_id"], None)
+                    else:
+                        rooms[entry["room_id"]] = entry["state"]
+        return rooms
+
+    def append(self, changes: Iterable[tuple[str, Optional[Dict[str, Any]]]]) -> None:
+        """Agrega al log el nuevo estado de las salas modificadas"""
+        lines = [
+            json.dumps({"room_id": room_id, "state": state}, separators=(",", ":"), ensure_ascii=False)
+            for room_id, state in changes
+        ]
+        if not lines:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        created = not self.log_path.exists()
+        with open(self.log_path, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        if created:
+            _fsync_dir(self.directory)
+        self.log_entries += len(lines)
+
+    def compact(self, rooms: Dict[str, Dict[str, Any]]) -> None:
+        """Reescribe el snapshot completo y vacía el log"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        _write_atomic(
+            self.snapshot_path,
+            json.dumps({"rooms": rooms}, separators=(",", ":"), ensure_ascii=False)
+        )
+        _write_atomic(self.log_path, "")
+        self.log_entries = 0
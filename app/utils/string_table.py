@@ -0,0 +1,141 @@
+"""
+Listas de strings de solo lectura en archivos mapeados en memoria (mmap).
+
+Formato del archivo (little-endian):
+
+    magic "IMST" | versión u32 | cantidad n u32
+    índice de offsets: n + 1 u32 (relativos al inicio de los datos)
+    tabla de strings: los n strings en UTF-8, uno detrás de otro
+
+Varios procesos que mapean el mismo archivo comparten las mismas páginas de
+memoria (en tmpfs, como /dev/shm, ni siquiera hay disco de por medio). Leer
+el elemento i decodifica solo ese string.
+"""
+
+import mmap
+import os
+import struct
+import time
+from collections.abc import Sequence
+from typing import Iterable, Optional
+
+_MAGIC = b"IMST"
+_VERSION = 1
+_HEADER = struct.Struct("<4sII")
+_OFFSET = struct.Struct("<II")
+_SUFFIX = ".strtab"
+
+
+def write_string_table(path: str, strings: Iterable[str]) -> None:
+    """Escribe la tabla de forma atómica (archivo temporal + rename)"""
+    encoded = [string.encode("utf-8") for string in strings]
+    offsets = [0]
+    for data in encoded:
+        offsets.append(offsets[-1] + len(data))
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, len(encoded)))
+        f.write(struct.pack(f"<{len(offsets)}I", *offsets))
+        f.write(b"".join(encoded))
+    os.replace(tmp_path, path)
+
+
+class StringTable(Sequence):
+    """
+    Secuencia inmutable de strings leída de un archivo mapeado en memoria.
+
+    El mapeo sigue siendo válido aunque el archivo se reemplace o se borre:
+    quien ya lo tiene sigue viendo la versión que abrió.
+    """
+
+    __slots__ = ("path", "_mmap", "_count", "_data_start")
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.path = path
+        if len(self._mmap) < _HEADER.size:
+            raise ValueError(f"{path}: archivo de strings truncado")
+        magic, version, count = _HEADER.unpack_from(self._mmap, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"{path}: formato de tabla de strings desconocido")
+        self._count = count
+        self._data_start = _HEADER.size + (count + 1) * 4
+        end = struct.unpack_from("<I", self._mmap, _HEADER.size + count * 4)[0]
+        if self._data_start + end > len(self._mmap):
+            raise ValueError(f"{path}: archivo de strings truncado")
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("índice fuera de rango")
+        start, end = _OFFSET.unpack_from(self._mmap, _HEADER.size + index * 4)
+        base = self._data_start
+        return self._mmap[base + start:base + end].decode("utf-8")
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, StringTable):
+            return self._mmap[:] == other._mmap[:]
+        if isinstance(other, (tuple, list)):
+            return tuple(self) == tuple(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._mmap)
+
+    def __repr__(self) -> str:
+        return f"StringTable({self.path!r}, {self._count} strings)"
+
+
+class SharedStringStore:
+    """
+    Directorio de tablas de strings compartidas entre procesos, una por clave.
+
+    El primer proceso que necesita una lista la publica; los demás mapean el
+    mismo archivo en lugar de armar su propia copia.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + _SUFFIX)
+
+    def open(self, key: str, newer_than: Optional[float] = None, max_age: Optional[float] = None) -> Optional[StringTable]:
+        """
+        Mapea la tabla publicada para `key`. Retorna None si no existe, si es
+        anterior a `newer_than` (timestamp) o si tiene más de `max_age` segundos.
+        """
+        path = self._path(key)
+        try:
+            mtime = os.stat(path).st_mtime
+            if newer_than is not None and mtime < newer_than:
+                return None
+            if max_age is not None and time.time() - mtime >= max_age:
+                return None
+            return StringTable(path)
+        except (OSError, ValueError):
+            return None
+
+    def publish(self, key: str, strings: Iterable[str]) -> StringTable:
+        """Publica (reemplazando la anterior) y mapea la tabla de `key`"""
+        path = self._path(key)
+        write_string_table(path, strings)
+        return StringTable(path)
+
+    def discard(self, key: str) -> None:
+        """Borra la tabla publicada (los procesos que ya la mapearon la conservan)"""
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,193 @@
+"""
+Microbenchmarks de los caminos calientes del juego.
+
+Mide, para salas de 2 a 1000 jugadores:
+    - GameService.new_round
+    - GameService.waiting_state
+    - RoomService.active_players
+    - RoomService.has_admin
+    - Player.info_in_round
+    - RoomManager.get_or_create_room de una sala existente (tamaño = salas ya existentes)
+
+Los resultados (nanosegundos por operación, mejor de varias repeticiones) se
+guardan en JSON y se comparan contra un baseline; las regresiones mayores al
+umbral se marcan y el proceso termina con código 1.
+
+Uso:
+    # Generar baseline (por ejemplo en main)
+    python benchmarks/bench_hot_paths.py --save benchmarks/baseline.json
+
+    # Comparar un cambio contra el baseline
+    python benchmarks/bench_hot_paths.py --baseline benchmarks/baseline.json --threshold 0.15
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.characters import PACKS, DEFAULT_PACK  # noqa: E402
+from app.models.player import Player  # noqa: E402
+from app.services.connection import Connection  # noqa: E402
+from app.services.game_service import GameService  # noqa: E402
+from app.services.room_manager import RoomManager  # noqa: E402
+
+SIZES = (2, 10, 100, 1000)
+characters = PACKS[DEFAULT_PACK]
+
+
+class NullConnection(Connection):
+    """Conexión que serializa pero descarta los frames (sin socket real)"""
+
+    def __init__(self):
+        super().__init__(websocket=None)
+
+    def enqueue(self, frame, code_ws: int) -> None:
+        pass
+
+
+def build_room(size: int) -> GameService:
+    """Sala con `size` jugadores conectados"""
+    game_service = GameService(quota_players=size, characters=characters)
+    for i in range(size):
+        game_service.connect(Player(f"player{i}"), NullConnection())
+    game_service._pending_changes.clear()
+    return game_service
+
+
+def measure(func: Callable[[], object], repeat: int, min_time: float) -> float:
+    """Nanosegundos por llamada (mejor de `repeat` tandas de al menos `min_time` s)"""
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time:
+            break
+        number *= 2
+    best = elapsed / number
+    for _ in range(repeat - 1):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - started) / number)
+    return best * 1e9
+
+
+def measure_async(func: Callable[[], Awaitable[object]], repeat: int, min_time: float) -> float:
+    """Igual que measure() para corrutinas (se miden dentro de un único event loop)"""
+    async def run() -> float:
+        number = 1
+        while True:
+            started = time.perf_counter()
+            for _ in range(number):
+                await func()
+            elapsed = time.perf_counter() - started
+            if elapsed >= min_time:
+                break
+            number *= 2
+        best = elapsed / number
+        for _ in range(repeat - 1):
+            started = time.perf_counter()
+            for _ in range(number):
+                await func()
+            best = min(best, (time.perf_counter() - started) / number)
+        return best * 1e9
+
+    return asyncio.run(run())
+
+
+def run_benchmarks(sizes: List[int], repeat: int, min_time: float) -> Dict[str, float]:
+    results: Dict[str, float] = {}
+    for size in sizes:
+        room = build_room(size)
+        player = room.players[0]
+        room.current_character = characters[0]
+
+        results[f"GameService.new_round[{size}]"] = measure_async(room.new_round, repeat, min_time)
+        results[f"GameService.waiting_state[{size}]"] = measure(lambda: room.waiting_state, repeat, min_time)
+        results[f"RoomService.active_players[{size}]"] = measure(
+            lambda: room.room_service.active_players, repeat, min_time
+        )
+        results[f"RoomService.has_admin[{size}]"] = measure(room.room_service.has_admin, repeat, min_time)
+        results[f"Player.info_in_round[{size}]"] = measure(
+            lambda: player.info_in_round(room.current_character), repeat, min_time
+        )
+
+        room_manager = RoomManager(quota_players=size, characters=characters)
+        for i in range(size):
+            room_manager.get_or_create_room(f"room{i}")
+        # Búsqueda de una sala existente (sin crear salas nuevas en cada iteración)
+        results[f"RoomManager.get_or_create_room[{size}]"] = measure(
+            lambda: room_manager.get_or_create_room("room0"), repeat, min_time
+        )
+    return results
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], threshold: float) -> List[str]:
+    """Retorna las líneas de los benchmarks que empeoraron más que `threshold`"""
+    regressions = []
+    for name, value in results.items():
+        previous = baseline.get(name)
+        if previous is None or previous <= 0:
+            continue
+        ratio = value / previous
+        marker = ""
+        if ratio > 1 + threshold:
+            marker = "  <-- REGRESIÓN"
+            regressions.append(name)
+        print(f"{name:50s} {previous:12.0f} -> {value:12.0f} ns  ({ratio:5.2f}x){marker}")
+    return regressions
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Microbenchmarks de los caminos calientes del juego")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES), help="Tamaños de sala")
+    parser.add_argument("--repeat", type=int, default=5, help="Repeticiones por benchmark")
+    parser.add_argument("--min-time", type=float, default=0.05, help="Duración mínima de cada tanda (s)")
+    parser.add_argument("--save", help="Guardar los resultados en este archivo JSON")
+    parser.add_argument("--baseline", help="Archivo JSON contra el que comparar")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Empeoramiento relativo tolerado")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    results = run_benchmarks(args.sizes, args.repeat, args.min_time)
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+        },
+        "results": results,
+    }
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regresión(es) mayores a {args.threshold:.0%}")
+            return 1
+        return 0
+
+    for name, value in results.items():
+        print(f"{name:50s} {value:12.0f} ns")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
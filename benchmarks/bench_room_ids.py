@@ -0,0 +1,79 @@
+"""
+Verificación y throughput del generador de IDs de sala.
+
+Genera millones de IDs con RoomIdAllocator, verifica que no haya ninguna
+colisión (también entre generadores con distinto prefijo) y compara el
+throughput contra el esquema anterior `str(uuid.uuid4())[:8]`.
+
+Uso:
+    python benchmarks/bench_room_ids.py --count 5000000
+"""
+
+import argparse
+import os
+import sys
+import time
+import uuid
+from typing import List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.room_ids import ALPHABET, ID_LENGTH, RoomIdAllocator  # noqa: E402
+
+
+def check_collisions(count: int, workers: int) -> int:
+    """Genera `count` IDs repartidos entre `workers` generadores. Retorna colisiones"""
+    allocators = [RoomIdAllocator(prefix=f"w{i}-" if workers > 1 else "") for i in range(workers)]
+    seen = set()
+    per_worker = count // workers
+    for allocator in allocators:
+        for _ in range(per_worker):
+            seen.add(allocator.next_id())
+    return per_worker * workers - len(seen)
+
+
+def check_format(samples: int) -> None:
+    allocator = RoomIdAllocator()
+    allowed = set(ALPHABET)
+    for _ in range(samples):
+        room_id = allocator.next_id()
+        assert len(room_id) == ID_LENGTH and set(room_id) <= allowed, room_id
+
+
+def check_wraparound() -> int:
+    """Un generador que cruza el borde del contador tampoco repite IDs"""
+    allocator = RoomIdAllocator(start=(1 << 40) - 50_000)
+    ids = [allocator.next_id() for _ in range(100_000)]
+    return len(ids) - len(set(ids))
+
+
+def throughput(func, count: int) -> float:
+    started = time.perf_counter()
+    for _ in range(count):
+        func()
+    return count / (time.perf_counter() - started)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Colisiones y throughput de IDs de sala")
+    parser.add_argument("--count", type=int, default=2_000_000, help="IDs a generar")
+    parser.add_argument("--workers", type=int, default=4, help="Generadores con prefijo distinto")
+    args = parser.parse_args(argv)
+
+    check_format(10_000)
+    collisions = check_collisions(args.count, 1)
+    prefixed_collisions = check_collisions(args.count, args.workers)
+    wrap_collisions = check_wraparound()
+    print(f"Colisiones en {args.count} IDs: {collisions}")
+    print(f"Colisiones en {args.count} IDs ({args.workers} workers con prefijo): {prefixed_collisions}")
+    print(f"Colisiones cruzando el borde del contador: {wrap_collisions}")
+
+    allocator = RoomIdAllocator()
+    print(f"RoomIdAllocator.next_id: {throughput(allocator.next_id, 1_000_000):,.0f} IDs/s")
+    print(f"uuid4()[:8]:             {throughput(lambda: str(uuid.uuid4())[:8], 1_000_000):,.0f} IDs/s")
+
+    return 1 if collisions or prefixed_collisions or wrap_collisions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
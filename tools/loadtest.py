@@ -0,0 +1,323 @@
+"""
+Generador de carga WebSocket para Impostor.
+
+Crea salas con POST /rooms, conecta jugadores a /ws/{room_id}, dispara rondas
+(`next_round`) a la tasa indicada y simula desconexiones con reanudación.
+Reporta latencia de conexión, latencia de fan-out del inicio de ronda
+(p50/p95/p99) y mensajes por segundo.
+
+Uso (levanta el servidor localmente en un puerto libre):
+    python tools/loadtest.py --spawn --rooms 200 --players 2 --rounds 20
+
+Contra un servidor ya corriendo:
+    python tools/loadtest.py --url http://127.0.0.1:8000 --rooms 50
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from typing import Dict, List, Optional
+
+import websockets
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Percentil por rango más cercano (values no vacío)"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    """Resumen en milisegundos"""
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "mean_ms": statistics.fmean(values) * 1000,
+        "p50_ms": percentile(values, 50) * 1000,
+        "p95_ms": percentile(values, 95) * 1000,
+        "p99_ms": percentile(values, 99) * 1000,
+        "max_ms": max(values) * 1000,
+    }
+
+
+class Stats:
+    """Mediciones acumuladas de toda la corrida"""
+
+    def __init__(self):
+        self.connect_latencies: List[float] = []
+        self.reconnect_latencies: List[float] = []
+        # Latencia desde next_round hasta que cada jugador recibe su ronda
+        self.fanout_latencies: List[float] = []
+        # Latencia hasta que el último jugador de la sala recibe su ronda
+        self.round_latencies: List[float] = []
+        self.messages_received = 0
+        self.rounds_started = 0
+        self.rounds_timed_out = 0
+        self.disconnects = 0
+        self.errors = 0
+
+
+class Room:
+    """Estado compartido por los clientes de una sala"""
+
+    def __init__(self, room_id: str, players: int):
+        self.room_id = room_id
+        self.players = players
+        self.round_started_at: Optional[float] = None
+        self.round_received = 0
+        self.round_done = asyncio.Event()
+
+
+class SwarmClient:
+    """Jugador simulado"""
+
+    def __init__(self, ws_url: str, room: Room, name: str, stats: Stats):
+        self.ws_url = ws_url
+        self.room = room
+        self.name = name
+        self.stats = stats
+        self.ws = None
+        self.is_admin = False
+        self.resume_token: Optional[str] = None
+        self.connected = asyncio.Event()
+        self._reader: Optional[asyncio.Task] = None
+
+    async def connect(self, resume: bool = False) -> None:
+        url = f"{self.ws_url}/ws/{self.room.room_id}?player_name={self.name}"
+        if resume and self.resume_token:
+            url += f"&resume_token={self.resume_token}"
+        self.connected.clear()
+        started = time.monotonic()
+        self.ws = await websockets.connect(url, max_size=None)
+        self._reader = asyncio.create_task(self._read_loop(self.ws))
+        await asyncio.wait_for(self.connected.wait(), timeout=10)
+        latencies = self.stats.reconnect_latencies if resume else self.stats.connect_latencies
+        latencies.append(time.monotonic() - started)
+
+    async def _read_loop(self, ws) -> None:
+        try:
+            async for raw in ws:
+                self.stats.messages_received += 1
+                self._handle(json.loads(raw))
+        except websockets.ConnectionClosed:
+            pass
+        except Exception:
+            self.stats.errors += 1
+
+    def _handle(self, message: dict) -> None:
+        code, data = message.get("code_ws"), message.get("data", {})
+        if code == 0:
+            asyncio.create_task(self.send({"action": "pong"}))
+        elif code == 1:
+            for player in data.get("players", []):
+                if player["name"] == self.name:
+                    self.is_admin = player["is_admin"]
+            self.connected.set()
+        elif code == 3:
+            for change in data.get("changes", []):
+                player = change.get("player")
+                if player and player["name"] == self.name:
+                    self.is_admin = player["is_admin"]
+        elif code == 4:
+            self.resume_token = data.get("resume_token")
+        elif code == 2:
+            self.is_admin = data.get("is_admin", self.is_admin)
+            room = self.room
+            if room.round_started_at is not None:
+                self.stats.fanout_latencies.append(time.monotonic() - room.round_started_at)
+                room.round_received += 1
+                if room.round_received >= room.players:
+                    self.stats.round_latencies.append(time.monotonic() - room.round_started_at)
+                    room.round_done.set()
+
+    async def send(self, message: dict) -> None:
+        try:
+            await self.ws.send(json.dumps(message))
+        except websockets.ConnectionClosed:
+            pass
+
+    async def drop(self) -> None:
+        """Corta la conexión sin avisar (como un cliente móvil que pierde red)"""
+        await self.ws.close()
+        if self._reader is not None:
+            await self._reader
+
+    async def close(self) -> None:
+        if self.ws is not None:
+            await self.send({"action": "leave"})
+            await self.ws.close()
+
+
+def http_post(url: str) -> dict:
+    request = urllib.request.Request(url, method="POST")
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return json.loads(response.read())
+
+
+async def run_room(args, ws_url: str, http_url: str, stats: Stats, index: int) -> None:
+    response = await asyncio.to_thread(http_post, f"{http_url}/rooms")
+    room = Room(response["room_id"], args.players)
+    clients = [
+        SwarmClient(ws_url, room, f"bot{index}_{i}", stats)
+        for i in range(args.players)
+    ]
+    try:
+        for client in clients:
+            await client.connect()
+        # Esperar a que el delta con el admin llegue a todos
+        await asyncio.sleep(0.2)
+
+        for _ in range(args.rounds):
+            admin = next((client for client in clients if client.is_admin), None)
+            if admin is None:
+                stats.errors += 1
+                break
+            room.round_received = 0
+            room.round_done.clear()
+            room.round_started_at = time.monotonic()
+            await admin.send({"action": "next_round"})
+            stats.rounds_started += 1
+            try:
+                await asyncio.wait_for(room.round_done.wait(), timeout=args.round_timeout)
+            except asyncio.TimeoutError:
+                stats.rounds_timed_out += 1
+            room.round_started_at = None
+
+            if random.random() < args.disconnect_rate:
+                victim = random.choice(clients)
+                stats.disconnects += 1
+                await victim.drop()
+                await victim.connect(resume=True)
+
+            await asyncio.sleep(1 / args.round_rate)
+    except Exception:
+        stats.errors += 1
+    finally:
+        for client in clients:
+            try:
+                await client.close()
+            except Exception:
+                pass
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def spawn_server(port: int) -> subprocess.Popen:
+    """Levanta uvicorn con la app en un puerto local y espera a que responda"""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=root,
+        # Sin snapshots ni límite de rondas por sala (la tasa la fija --round-rate)
+        env={**os.environ, "SNAPSHOT_DIR": "", "ROOM_ROUND_RATE": "0"},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 20
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/rooms/stats", timeout=1)
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("El servidor no respondió a tiempo")
+
+
+async def main(args) -> dict:
+    stats = Stats()
+    http_url = args.url.rstrip("/")
+    ws_url = http_url.replace("http", "ws", 1)
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def limited(index: int) -> None:
+        async with semaphore:
+            await run_room(args, ws_url, http_url, stats, index)
+
+    started = time.monotonic()
+    await asyncio.gather(*(limited(i) for i in range(args.rooms)))
+    elapsed = time.monotonic() - started
+    return {
+        "rooms": args.rooms,
+        "players_per_room": args.players,
+        "elapsed_s": elapsed,
+        "messages_received": stats.messages_received,
+        "messages_per_s": stats.messages_received / elapsed if elapsed else 0.0,
+        "rounds_started": stats.rounds_started,
+        "rounds_timed_out": stats.rounds_timed_out,
+        "disconnects": stats.disconnects,
+        "errors": stats.errors,
+        "connect_latency": summarize(stats.connect_latencies),
+        "reconnect_latency": summarize(stats.reconnect_latencies),
+        "fanout_latency": summarize(stats.fanout_latencies),
+        "round_latency": summarize(stats.round_latencies),
+    }
+
+
+def print_report(report: dict) -> None:
+    print(f"Salas: {report['rooms']} x {report['players_per_room']} jugadores en {report['elapsed_s']:.1f}s")
+    print(f"Mensajes recibidos: {report['messages_received']} ({report['messages_per_s']:.0f}/s)")
+    print(
+        f"Rondas: {report['rounds_started']} (timeouts: {report['rounds_timed_out']}), "
+        f"desconexiones: {report['disconnects']}, errores: {report['errors']}"
+    )
+    for key, label in (
+        ("connect_latency", "Conexión"),
+        ("reconnect_latency", "Reanudación"),
+        ("fanout_latency", "Fan-out de ronda (por jugador)"),
+        ("round_latency", "Fan-out de ronda (sala completa)"),
+    ):
+        summary = report[key]
+        if summary["count"]:
+            print(
+                f"{label}: n={summary['count']} p50={summary['p50_ms']:.2f}ms "
+                f"p95={summary['p95_ms']:.2f}ms p99={summary['p99_ms']:.2f}ms max={summary['max_ms']:.2f}ms"
+            )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generador de carga WebSocket para Impostor")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="URL base del servidor")
+    parser.add_argument("--spawn", action="store_true", help="Levantar el servidor localmente en un puerto libre")
+    parser.add_argument("--rooms", type=int, default=50, help="Cantidad de salas")
+    parser.add_argument("--players", type=int, default=2, help="Jugadores por sala (debe coincidir con quota_players)")
+    parser.add_argument("--rounds", type=int, default=10, help="Rondas por sala")
+    parser.add_argument("--round-rate", type=float, default=2.0, help="Rondas por segundo por sala")
+    parser.add_argument("--round-timeout", type=float, default=5.0, help="Timeout de una ronda (s)")
+    parser.add_argument("--disconnect-rate", type=float, default=0.1, help="Probabilidad de desconexión por ronda")
+    parser.add_argument("--concurrency", type=int, default=1000, help="Máximo de salas simultáneas")
+    parser.add_argument("--json", dest="json_path", help="Guardar el reporte en este archivo JSON")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    server = None
+    if arguments.spawn:
+        port = free_port()
+        server = spawn_server(port)
+        arguments.url = f"http://127.0.0.1:{port}"
+    try:
+        result = asyncio.run(main(arguments))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+    print_report(result)
+    if arguments.json_path:
+        with open(arguments.json_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)